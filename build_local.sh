@@ -150,7 +150,6 @@ export PYTHONPATH=`pwd`/threeML/test:${PYTHONPATH}
 export MPLBACKEND='Agg'
 export OMP_NUM_THREADS=1
 export MKL_NUM_THREADS=1
-export NUMEXPR_NUM_THREADS=1
 
 # Run tests
 cd threeML/test
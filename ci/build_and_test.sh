@@ -133,7 +133,6 @@ export PYTHONPATH=`pwd`/threeML/test:${PYTHONPATH}
 export MPLBACKEND='Agg'
 export OMP_NUM_THREADS=1
 export MKL_NUM_THREADS=1
-export NUMEXPR_NUM_THREADS=1
 
 # Before running the test, if we are on linux, install cthreeml and verify that
 # we can actually import the HAWC plugin
@@ -39,7 +39,6 @@ source threeML_init.sh
 export MPLBACKEND='Agg'
 export OMP_NUM_THREADS=1
 export MKL_NUM_THREADS=1
-export NUMEXPR_NUM_THREADS=1
 
 pytest -vv --pyargs threeML
 pytest -vv --pyargs astromodels
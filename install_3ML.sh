@@ -187,7 +187,6 @@ generate_init_script() {
 export PATH=${PATH}
 export OMP_NUM_THREADS=1
 export MKL_NUM_THREADS=1
-export NUMEXPR_NUM_THREADS=1
 source activate ${ENV_NAME}
 
 EOM
@@ -196,7 +195,6 @@ EOM
 
 setenv OMP_NUM_THREADS 1
 setenv MKL_NUM_THREADS 1
-setenv NUMEXPR_NUM_THREADS 1
 setenv CONDA_ENVS_PATH $(conda info | grep "envs directories" | cut -f2 -d":" )
 
 source ${CONDA_PREFIX}/bin/deactivate.csh >& /dev/null
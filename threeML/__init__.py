@@ -8,6 +8,19 @@ import os
 import traceback
 import warnings
 
+# keep the on-disk cache of the numba compiled kernels (cache=True) in a
+# per-user location so that it is shared by all the processes and
+# survives read-only installations. This must be set before numba is imported
+
+os.environ.setdefault(
+    "NUMBA_CACHE_DIR",
+    os.path.join(
+        os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+        "threeml",
+        "numba",
+    ),
+)
+
 # Workaround to avoid a segmentation fault with ROOT and a CFITSIO issue
 # LEAVE THESE HERE BEFORE ANY THREEML IMPORT
 try:
@@ -360,7 +373,7 @@ from .io import get_threeML_style, set_threeML_style
 # situation, opening threads introduces overhead with no performance gain. This solution
 # allows cores to be used for multi-cpu computation with the parallel client
 
-var_to_check = ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS"]
+var_to_check = ["OMP_NUM_THREADS", "MKL_NUM_THREADS"]
 
 
 for var in var_to_check:
@@ -1076,7 +1076,7 @@ class BayesianResults(_AnalysisResults):
 
         if components is None:
             assert (
-                len(list(self._free_parameters.keys()))
+                len(self._free_parameters)
                 == self._samples_transposed.T[0].shape[0]
             ), (
                 "Mismatch between sample" " dimensions and number of free" " parameters"
@@ -1323,7 +1323,7 @@ class BayesianResults(_AnalysisResults):
 
             if other_fit.samples is not None:
                 assert (
-                    len(list(other_fit._free_parameters.keys()))
+                    len(other_fit._free_parameters)
                     == other_fit.samples.T[0].shape[0]
                 ), (
                     "Mismatch between sample"
@@ -216,7 +216,7 @@ class AutoEmceeSampler(UnitCubeSampler):
                 [sampler.transform(s.get_chain(flat=True)) for s in self._sampler.samplers])
 
             # First we need the prior
-            log_prior = [self._log_prior(x) for x in self._raw_samples]
+            log_prior = self._log_prior_of_samples(self._raw_samples)
 
             self._log_probability_values = np.concatenate(
                 [s.get_log_prob(flat=True) for s in self._sampler.samplers])
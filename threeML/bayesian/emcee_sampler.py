@@ -11,15 +11,52 @@ from threeML.io.detect_notebook import is_inside_notebook
 from threeML.io.logging import setup_logger
 from threeML.parallel.parallel_client import ParallelClient
 
+try:
+
+    # see if we have mpi and/or are using parallel
+
+    from mpi4py import MPI
+
+    if MPI.COMM_WORLD.Get_size() > 1:  # need parallel capabilities
+        using_mpi = True
+
+        comm = MPI.COMM_WORLD
+        rank = comm.Get_rank()
+
+        from mpi4py.futures import MPIPoolExecutor
+        from mpi4py.futures import _lib as _mpi_futures_lib
+
+    else:
+
+        using_mpi = False
+except:
+
+    using_mpi = False
+
 log = setup_logger(__name__)
 
 
+def _launched_with_mpi_futures() -> bool:
+    """
+    whether the script runs under python -m mpi4py.futures. Only then
+    does the root rank alone run it while the other ranks serve the
+    MPIPoolExecutor. With a plain mpiexec launch every rank runs the
+    whole script, and each of them would start its own pool
+    """
+
+    return getattr(_mpi_futures_lib, "SharedPool", None) is not None
+
+
 class EmceeSampler(MCMCSampler):
     def __init__(self, likelihood_model=None, data_list=None, **kwargs):
         """
         Sample using the emcee sampler. For details:
         https://emcee.readthedocs.io/en/stable/
 
+        The walkers are spread over MPI ranks only if the script is
+        launched with mpiexec -n N python -m mpi4py.futures script.py.
+        With a plain mpiexec launch each rank samples on its own
+
         :param likelihood_model:
         :param data_list:
         :returns:
@@ -34,6 +71,7 @@ class EmceeSampler(MCMCSampler):
               n_burn_in: Optional[int] = None,
               n_walkers: int = 20,
               seed=None,
+              backend: Optional[emcee.backends.Backend] = None,
               **kwargs):
 
         """TODO describe function
@@ -46,6 +84,9 @@ class EmceeSampler(MCMCSampler):
         :type n_walkers: int
         :param seed: 
         :type seed: 
+        :param backend: an emcee backend (e.g. emcee.backends.HDFBackend)
+        where the chain is stored instead of in memory
+        :type backend: Optional[emcee.backends.Backend]
         :returns: 
 
         """
@@ -69,6 +110,8 @@ class EmceeSampler(MCMCSampler):
 
         self._seed = seed
 
+        self._backend = backend
+
         self._kwargs = kwargs
 
         # we control progress with the config
@@ -90,7 +133,7 @@ class EmceeSampler(MCMCSampler):
 
         self._update_free_parameters()
 
-        n_dim = len(list(self._free_parameters.keys()))
+        n_dim = len(self._free_parameters)
 
         # Get starting point
 
@@ -100,57 +143,96 @@ class EmceeSampler(MCMCSampler):
         # same set of parameters
         with use_astromodels_memoization(False):
 
-            if threeML_config["parallel"]["use_parallel"]:
+            # under MPI the walkers of each step are spread over the ranks,
+            # which needs the pool served by an mpi4py.futures launch
 
-                c = ParallelClient()
-                view = c[:]
+            executor = None
 
-                sampler = emcee.EnsembleSampler(
-                    self._n_walkers, n_dim, self.get_posterior, pool=view
-                )
+            if using_mpi:
 
-            else:
+                if _launched_with_mpi_futures():
 
-                sampler = emcee.EnsembleSampler(
-                    self._n_walkers, n_dim, self.get_posterior
-                )
+                    executor = MPIPoolExecutor()
+
+                else:
+
+                    log.warning(
+                        "emcee spreads the walkers over the MPI ranks only when "
+                        "launched with mpiexec -n N python -m mpi4py.futures "
+                        "script.py. Sampling serially on this rank"
+                    )
 
-            # If a seed is provided, set the random number seed
-            if self._seed is not None:
+            # the executor is shut down whatever happens from here on,
+            # including a backend that fails when the sampler is built
 
-                sampler._random.seed(self._seed)
+            try:
 
-            log.debug("Start emcee run")
-            # Sample the burn-in
+                if executor is not None:
 
-            if threeML_config.interface.progress_bars:
+                    sampler = emcee.EnsembleSampler(
+                        self._n_walkers, n_dim, self.get_posterior, pool=executor,
+                        backend=self._backend,
+                    )
 
-                if is_inside_notebook():
+                elif threeML_config["parallel"]["use_parallel"]:
 
-                    progress = "notebook"
+                    c = ParallelClient()
+                    view = c[:]
+
+                    sampler = emcee.EnsembleSampler(
+                        self._n_walkers, n_dim, self.get_posterior, pool=view,
+                        backend=self._backend,
+                    )
+
+                else:
+
+                    sampler = emcee.EnsembleSampler(
+                        self._n_walkers, n_dim, self.get_posterior,
+                        backend=self._backend,
+                    )
+
+                # If a seed is provided, set the random number seed
+                if self._seed is not None:
+
+                    sampler._random.seed(self._seed)
+
+                log.debug("Start emcee run")
+                # Sample the burn-in
+
+                if threeML_config.interface.progress_bars:
+
+                    if is_inside_notebook():
+
+                        progress = "notebook"
+
+                    else:
+                        progress = True
 
                 else:
-                    progress = True
 
-            else:
+                    progress = False
+
+                pos, prob, state = sampler.run_mcmc(
+                    initial_state=p0, nsteps=self._n_burn_in, progress=progress
+                )
+                log.debug("Emcee run done")
+
+                # Reset sampler
 
-                progress = False
+                sampler.reset()
 
-            pos, prob, state = sampler.run_mcmc(
-                initial_state=p0, nsteps=self._n_burn_in, progress=progress
-            )
-            log.debug("Emcee run done")
+                state = emcee.State(pos, prob, random_state=state)
 
-            # Reset sampler
+                # Run the true sampling
 
-            sampler.reset()
+                _ = sampler.run_mcmc(
+                    initial_state=state, nsteps=self._n_iterations, progress=progress)
 
-            state = emcee.State(pos, prob, random_state=state)
+            finally:
 
-            # Run the true sampling
+                if executor is not None:
 
-            _ = sampler.run_mcmc(
-                initial_state=state, nsteps=self._n_iterations, progress=progress)
+                    executor.shutdown()
 
         acc=np.mean(sampler.acceptance_fraction)
 
@@ -162,15 +244,16 @@ class EmceeSampler(MCMCSampler):
         # Compute the corresponding values of the likelihood
 
         # First we need the prior
-        log_prior=[self._log_prior(x) for x in self._raw_samples]
+        log_prior=self._log_prior_of_samples(self._raw_samples)
 
-        # Now we get the log posterior and we remove the log prior
+        # we also want to store the log probability. We get it only once
+        # as each call to get_log_prob makes a copy of the full chain
 
-        self._log_like_values=sampler.get_log_prob(flat=True) - log_prior
+        self._log_probability_values=sampler.get_log_prob(flat=True)
 
-        # we also want to store the log probability
+        # Now we get the log posterior and we remove the log prior
 
-        self._log_probability_values=sampler.get_log_prob(flat=True)
+        self._log_like_values=self._log_probability_values - log_prior
 
         self._marginal_likelihood=None
 
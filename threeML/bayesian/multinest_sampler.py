@@ -130,7 +130,7 @@ class MultiNestSampler(UnitCubeSampler):
 
         self._update_free_parameters()
 
-        n_dim = len(list(self._free_parameters.keys()))
+        n_dim = len(self._free_parameters)
 
         # MULTINEST uses a different call signiture for
         # sampling so we construct callbakcs
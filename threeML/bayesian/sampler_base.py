@@ -4,6 +4,7 @@ import math
 from typing import Dict, Optional
 
 import numpy as np
+import scipy.stats
 from threeML.config import threeML_config
 
 try:
@@ -66,7 +67,7 @@ class SamplerBase(metaclass=abc.ABCMeta):
         self._likelihood_model: Model = likelihood_model
         self._data_list: DataList = data_list
 
-        self._n_plugins: int = len(list(self._data_list.keys()))
+        self._n_plugins: int = len(self._data_list.keys())
 
         # Share spectrum flag if the spectrum should only be calculated
         # once when different data_list entries have the same input energy bins.
@@ -155,9 +156,10 @@ class SamplerBase(metaclass=abc.ABCMeta):
         """
         idx = arg_median(self._log_probability_values)
 
-        for i, (parameter_name, parameter) in enumerate(self._free_parameters.items()):
+        # take the whole row of samples at once instead
+        # of indexing the samples of each parameter
 
-            par = self._samples[parameter_name][idx]
+        for parameter, par in zip(self._free_parameters.values(), self._raw_samples[idx]):
 
             parameter.value = par
 
@@ -200,19 +202,7 @@ class SamplerBase(metaclass=abc.ABCMeta):
 
         """
 
-        # set the median or MAP
-
-                # Instance the result
-        if threeML_config.bayesian.use_median_fit:
-
-            self.restore_median_fit()
-
-        else:
-
-            self.restore_MAP_fit()
-
-
-        # Find maximum of the log posterior
+        # Find the median or the maximum of the log posterior
 
         if threeML_config.bayesian.use_median_fit:
 
@@ -226,9 +216,9 @@ class SamplerBase(metaclass=abc.ABCMeta):
         approximate_MAP_point = self._raw_samples[idx, :]
 
         # Sets the values of the parameters to their MAP values
-        for i, parameter in enumerate(self._free_parameters):
+        for parameter, value in zip(self._free_parameters.values(), approximate_MAP_point):
 
-            self._free_parameters[parameter].value = approximate_MAP_point[i]
+            parameter.value = value
 
         # Get the value of the posterior for each dataset at the MAP
         log_posteriors = collections.OrderedDict()
@@ -278,7 +268,9 @@ class SamplerBase(metaclass=abc.ABCMeta):
 
         # TODO: add WAIC
 
-        # Instance the result
+        # the DIC evaluates the posterior at the mean of the samples,
+        # so restore the median or MAP before instancing the result
+
         if threeML_config.bayesian.use_median_fit:
 
             self.restore_median_fit()
@@ -368,6 +360,22 @@ class SamplerBase(metaclass=abc.ABCMeta):
 
         return log_prior
 
+    def _log_prior_of_samples(self, samples) -> np.ndarray:
+        """
+        Compute the log prior for each row of a chain. Rejected steps leave
+        the walkers in place, so the chain contains many identical rows:
+        the prior is evaluated only once for each unique row
+
+        :param samples: 2D array of samples (n_samples, n_dim)
+        :returns: array of log prior values
+        """
+
+        unique_samples, inverse = np.unique(samples, axis=0, return_inverse=True)
+
+        log_prior = np.array([self._log_prior(x) for x in unique_samples])
+
+        return log_prior[inverse.reshape(-1)]
+
     def _log_like(self, trial_values) -> float:
         """Compute the log-likelihood"""
 
@@ -465,15 +473,25 @@ class MCMCSampler(SamplerBase):
         # Fractional variance for randomization
 
         # (0.1 means var = 0.1 * value )
-        p0 = []
 
-        for i in range(n_walkers):
-            this_p0 = [
-                x.get_randomized_value(variance)
-                for x in list(self._free_parameters.values())
-            ]
+        # All the walkers are drawn at once for each parameter, instead
+        # of asking each parameter for one randomized value per walker
+
+        # if the sampler was given a seed, the starting points are drawn
+        # from a generator seeded with it so that the whole run is
+        # reproducible. Otherwise the global numpy state is used
+
+        seed = getattr(self, "_seed", None)
 
-            p0.append(this_p0)
+        random_state = np.random.default_rng(seed) if seed is not None else None
+
+        p0 = np.empty((n_walkers, len(self._free_parameters)), dtype=np.float64)
+
+        for i, parameter in enumerate(self._free_parameters.values()):
+
+            p0[:, i] = _get_randomized_values(
+                parameter, n_walkers, variance, random_state=random_state
+            )
 
         return p0
 
@@ -564,6 +582,40 @@ def arg_median(a):
         return np.where(a == np.median(a))[0][0]
     else:
         l, r = len(a) // 2 - 1, len(a) // 2
-        left = np.partition(a, l)[l]
-        right = np.partition(a, r)[r]
+        # a single partition places both middle elements
+        partitioned = np.partition(a, (l, r))
+        left = partitioned[l]
+        right = partitioned[r]
         return min([np.where(a == left)[0][0], np.where(a == right)[0][0]])
+
+
+def _get_randomized_values(parameter, n_values, variance=0.1, random_state=None):
+    """
+    Generate n_values random values close to the current value of the parameter,
+    but within its boundaries. This is the vectorized equivalent of
+    Parameter.get_randomized_value
+
+    :param parameter: the parameter to randomize
+    :param n_values: the number of values to draw
+    :param variance: fractional variance for randomization
+    :param random_state: a numpy Generator to draw from (None uses the global state)
+    :returns: array of randomized values
+    """
+
+    value = parameter.value
+
+    min_value = parameter.min_value if parameter.min_value is not None else -np.inf
+    max_value = parameter.max_value if parameter.max_value is not None else np.inf
+
+    # if the value is zero we cannot use a fractional spread
+
+    scale = abs(value * variance) if value != 0 else variance
+
+    # truncnorm wants the boundaries in units of scale
+
+    a = (min_value - value) / scale
+    b = (max_value - value) / scale
+
+    return scipy.stats.truncnorm.rvs(
+        a, b, loc=value, scale=scale, size=n_values, random_state=random_state
+    )
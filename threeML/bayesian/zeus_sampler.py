@@ -97,7 +97,7 @@ class ZeusSampler(MCMCSampler):
 
         self._update_free_parameters()
 
-        n_dim = len(list(self._free_parameters.keys()))
+        n_dim = len(self._free_parameters)
 
         # Get starting point
 
@@ -164,7 +164,7 @@ class ZeusSampler(MCMCSampler):
         # Compute the corresponding values of the likelihood
 
         # First we need the prior
-        log_prior = np.array([self._log_prior(x) for x in self._raw_samples])
+        log_prior = self._log_prior_of_samples(self._raw_samples)
         self._log_probability_values = sampler.get_log_prob(flat=True, discard=self._n_burn_in)
 
 
@@ -3,7 +3,6 @@ from enum import Enum, Flag
 from typing import Any, Dict, List, Optional
 
 import numpy as np
-import matplotlib.pyplot as plt
 from omegaconf import II, MISSING, SI, OmegaConf
 
 from .plotting_structure import CornerStyle, MPLCmap
@@ -2,7 +2,6 @@ from dataclasses import dataclass, field
 from enum import Enum, Flag
 from typing import Any, Dict, List, Optional
 
-import matplotlib.pyplot as plt
 from omegaconf import II, MISSING, SI, OmegaConf
 
 from .plotting_structure import BinnedSpectrumPlot, DataHistPlot, MPLCmap
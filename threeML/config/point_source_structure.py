@@ -2,7 +2,6 @@ from dataclasses import dataclass, field
 from enum import Enum, Flag, IntEnum
 from typing import Any, Dict, List, Optional
 
-import matplotlib.pyplot as plt
 from omegaconf import II, MISSING, SI, OmegaConf
 
 class IntegrateMethod(IntEnum):
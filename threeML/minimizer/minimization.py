@@ -448,7 +448,7 @@ class Minimizer(object):
         self._function = function
         self._external_parameters = parameters
         self._internal_parameters = self._update_internal_parameter_dictionary()
-        self._Npar = len(list(self.parameters.keys()))
+        self._Npar = len(self.parameters)
         self._verbosity = verbosity
 
         self._setup(setup_dict)
@@ -1,3 +1,4 @@
+import numba as nb
 import numpy as np
 
 from threeML.io.uncertainty_formatter import uncertainty_formatter
@@ -142,9 +143,10 @@ class RandomVariates(np.ndarray):
 
         # NOTE: we cannot sort the array, because we would destroy the covariance with other physical quantities,
         # so we get a copy instead. This copy will live only for the duration of this method (but of course will be
-        # collected only whenevery the garbage collector decides to).
+        # collected only whenevery the garbage collector decides to). np.sort already returns a copy, so there
+        # is no need to copy the samples beforehand
 
-        ordered = np.sort(np.array(self))
+        ordered = np.sort(np.asarray(self))
 
         n = ordered.size
 
@@ -161,20 +163,14 @@ class RandomVariates(np.ndarray):
 
         index_of_leftmost_possibility = n - index_of_rightmost_possibility
 
-        # Now compute the width of all intervals that might be the one we are looking for
-
-        interval_width = (
-            ordered[index_of_rightmost_possibility:]
-            - ordered[:index_of_leftmost_possibility]
-        )
-
         # This might happen if there are too few values
-        if len(interval_width) == 0:
+        if index_of_leftmost_possibility <= 0:
             raise RuntimeError("Too few elements for interval calculation")
 
-        # Find the index of the shortest interval
+        # Now find the index of the shortest of all the intervals that might be the one we are looking for.
+        # This is done in a single pass without materializing the interval widths
 
-        idx_of_minimum = np.argmin(interval_width)
+        idx_of_minimum = _min_interval_index(ordered, index_of_rightmost_possibility)
 
         # Find the extremes of the shortest interval
 
@@ -230,3 +226,25 @@ class RandomVariates(np.ndarray):
     def __str__(self):
 
         return self.__repr__()
+
+
+@nb.njit(fastmath=True, cache=True)
+def _min_interval_index(ordered, width):
+    """
+    find the index of the shortest interval spanning width elements
+    of the sorted array ordered
+    """
+
+    idx_of_minimum = 0
+    minimum = ordered[width] - ordered[0]
+
+    for i in range(1, ordered.shape[0] - width):
+
+        this_width = ordered[i + width] - ordered[i]
+
+        if this_width < minimum:
+
+            minimum = this_width
+            idx_of_minimum = i
+
+    return idx_of_minimum
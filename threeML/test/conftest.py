@@ -22,6 +22,7 @@ from threeML.utils.photometry import get_photometric_filter_library, Photometeri
 from threeML.plugins.UnbinnedPoissonLike import EventObservation
 from threeML.plugins.XYLike import XYLike
 from threeML.utils.numba_utils import VectorFloat64
+from threeML.utils.binner import Rebinner
 
 from threeML.io.logging import debug_mode
 
@@ -30,6 +31,9 @@ np.random.seed(12345)
 # useful for testing
 debug_mode()
 
+# check that the rebinned vectors keep the total counts
+Rebinner._verify = True
+
 # Set up an ipyparallel cluster for the tests to use
 
 
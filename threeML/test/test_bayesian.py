@@ -122,6 +122,106 @@ def test_emcee(bayes_fitter):
     # This has been already tested in the fixtures (see conftest.py)
 
 
+def test_emcee_backend(bayes_fitter, completed_bn090217206_bayesian_analysis):
+
+    import emcee
+
+    bayes, _ = completed_bn090217206_bayesian_analysis
+
+    bayes.set_sampler("emcee")
+
+    backend = emcee.backends.Backend()
+
+    bayes.sampler.setup(n_iterations=200, n_walkers=20, backend=backend)
+
+    bayes.sample()
+
+    # the burn in is reset, so only the sampling is stored in the backend
+
+    assert bayes.sampler._sampler.backend is backend
+
+    assert backend.iteration == 200
+
+    assert np.array_equal(backend.get_chain(flat=True), bayes.raw_samples)
+
+    check_results(bayes.results.get_data_frame())
+
+
+def test_emcee_executor_shutdown_on_backend_error(
+    bayes_fitter, completed_bn090217206_bayesian_analysis, monkeypatch
+):
+
+    import emcee
+
+    import threeML.bayesian.emcee_sampler as emcee_sampler
+
+    class FakeExecutor(object):
+
+        shut_down = False
+
+        def map(self, function, iterable):
+
+            return map(function, iterable)
+
+        def shutdown(self):
+
+            FakeExecutor.shut_down = True
+
+    class FailingBackend(emcee.backends.Backend):
+
+        def reset(self, nwalkers, ndim):
+
+            raise RuntimeError("backend failure")
+
+    monkeypatch.setattr(emcee_sampler, "using_mpi", True)
+    monkeypatch.setattr(emcee_sampler, "_launched_with_mpi_futures", lambda: True)
+    monkeypatch.setattr(
+        emcee_sampler, "MPIPoolExecutor", FakeExecutor, raising=False
+    )
+
+    bayes, _ = completed_bn090217206_bayesian_analysis
+
+    bayes.set_sampler("emcee")
+
+    bayes.sampler.setup(n_iterations=10, n_walkers=20, backend=FailingBackend())
+
+    with pytest.raises(RuntimeError):
+
+        bayes.sample()
+
+    assert FakeExecutor.shut_down
+
+
+def test_emcee_plain_mpiexec_launch_samples_serially(
+    bayes_fitter, completed_bn090217206_bayesian_analysis, monkeypatch
+):
+
+    import threeML.bayesian.emcee_sampler as emcee_sampler
+
+    # under a plain mpiexec launch every rank runs the script, so
+    # none of them may start a pool of its own
+
+    def no_executor():
+
+        raise AssertionError("an MPIPoolExecutor was started")
+
+    monkeypatch.setattr(emcee_sampler, "using_mpi", True)
+    monkeypatch.setattr(emcee_sampler, "_launched_with_mpi_futures", lambda: False)
+    monkeypatch.setattr(
+        emcee_sampler, "MPIPoolExecutor", no_executor, raising=False
+    )
+
+    bayes, _ = completed_bn090217206_bayesian_analysis
+
+    bayes.set_sampler("emcee")
+
+    bayes.sampler.setup(n_iterations=50, n_walkers=20)
+
+    bayes.sample()
+
+    assert bayes.raw_samples.shape[0] == 50 * 20
+
+
 @skip_if_pymultinest_is_not_available
 def test_multinest(bayes_fitter, completed_bn090217206_bayesian_analysis):
 
@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+
+from threeML.utils.bayesian_blocks import (bayesian_blocks,
+                                           bayesian_blocks_not_unique)
+
+
+def _reference_change_points(block_length, n_per_cell, priors):
+
+    # the original loop of Scargle et al. 2012, one prefix at a time
+
+    N = n_per_cell.shape[0]
+
+    best = np.zeros(N, dtype=float)
+    last = np.zeros(N, dtype=int)
+
+    for R in range(N):
+
+        T_k = block_length[: R + 1] - block_length[R + 1]
+
+        N_k = np.cumsum(n_per_cell[: R + 1][::-1])[::-1]
+
+        with np.errstate(divide="ignore"):
+
+            A_R = N_k * np.log(N_k / T_k) - priors[R]
+
+        A_R[1:] += best[:R]
+
+        last[R] = A_R.argmax()
+        best[R] = A_R[last[R]]
+
+    change_points = [N]
+
+    while change_points[-1] > 0:
+
+        change_points.append(last[change_points[-1] - 1])
+
+    return np.array(change_points[::-1])
+
+
+def _reference_bayesian_blocks(tt, ttstart, ttstop, p0, bkg_integral_distribution=None):
+
+    if bkg_integral_distribution is None:
+
+        t, tstop = tt, ttstop
+
+    else:
+
+        t = bkg_integral_distribution(tt)
+        tstop = bkg_integral_distribution(ttstop)
+
+    edges = np.concatenate([[t[0]], 0.5 * (t[1:] + t[:-1]), [t[-1]]])
+    edges_ = np.concatenate([[tt[0]], 0.5 * (tt[1:] + tt[:-1]), [tt[-1]]])
+
+    N = t.shape[0]
+
+    priors = np.full(N, 4 - np.log(73.53 * p0 * (N ** -0.478)))
+
+    change_points = _reference_change_points(tstop - edges, np.ones(N), priors)
+
+    final_edges = edges_[change_points]
+
+    final_edges[0] = ttstart
+    final_edges[-1] = ttstop
+
+    return final_edges
+
+
+def _reference_bayesian_blocks_not_unique(tt, ttstart, ttstop, p0):
+
+    unique_t = np.unique(tt)
+
+    edges = np.concatenate(
+        [[ttstart], 0.5 * (unique_t[1:] + unique_t[:-1]), [ttstop]]
+    )
+
+    N = unique_t.shape[0]
+
+    priors = 4 - np.log(73.53 * p0 * np.power(np.arange(1, N + 1), -0.478))
+
+    x, _ = np.histogram(tt, edges)
+
+    change_points = _reference_change_points(ttstop - edges, x, priors)
+
+    return edges[change_points]
+
+
+def _burst_events(seed):
+
+    # a step in the rate on top of a flat background
+
+    rng = np.random.default_rng(seed)
+
+    events = np.concatenate(
+        [rng.uniform(0, 100, 500), rng.uniform(40, 60, 400)]
+    )
+
+    return np.sort(events)
+
+
+@pytest.mark.parametrize("p0", [1e-3, 0.05, 0.5])
+@pytest.mark.parametrize("seed", [1234, 4321])
+def test_bayesian_blocks_against_reference(seed, p0):
+
+    events = _burst_events(seed)
+
+    edges = bayesian_blocks(events, 0, 100, p0)
+
+    reference = _reference_bayesian_blocks(events, 0, 100, p0)
+
+    assert edges.shape == reference.shape
+
+    assert np.allclose(edges, reference)
+
+
+@pytest.mark.parametrize("p0", [1e-3, 0.1])
+def test_bayesian_blocks_with_background_against_reference(p0):
+
+    events = _burst_events(1234)
+
+    def bkg_integral_distribution(t):
+
+        return 5.0 * np.asarray(t) + 0.01 * np.asarray(t) ** 2
+
+    edges = bayesian_blocks(events, 0, 100, p0, bkg_integral_distribution)
+
+    reference = _reference_bayesian_blocks(
+        events, 0, 100, p0, bkg_integral_distribution
+    )
+
+    assert edges.shape == reference.shape
+
+    assert np.allclose(edges, reference)
+
+
+@pytest.mark.parametrize("p0", [1e-3, 0.05, 0.5])
+@pytest.mark.parametrize("seed", [1234, 4321])
+def test_bayesian_blocks_not_unique_against_reference(seed, p0):
+
+    # coarse time stamps so that many events share the same time
+
+    events = np.round(_burst_events(seed), 1)
+
+    assert np.unique(events).shape[0] < events.shape[0]
+
+    edges = bayesian_blocks_not_unique(events, 0, 100, p0)
+
+    reference = _reference_bayesian_blocks_not_unique(events, 0, 100, p0)
+
+    assert edges.shape == reference.shape
+
+    assert np.allclose(edges, reference)
@@ -0,0 +1,347 @@
+import numpy as np
+import pytest
+
+from threeML.utils.binner import Rebinner, TemporalBinner
+
+
+def _reference_scan(vector_to_rebin_on, min_value_per_bin, mask):
+
+    # the original pure python scan of the Rebinner
+
+    starts = []
+    stops = []
+    grouping = np.zeros(len(vector_to_rebin_on), dtype=int)
+
+    n = 0
+    bin_open = False
+
+    n_grouped_bins = 0
+
+    for index, b in enumerate(vector_to_rebin_on):
+
+        if not mask[index]:
+
+            if not bin_open:
+
+                continue
+
+            stops.append(index)
+            n = 0
+            bin_open = False
+
+            if n_grouped_bins > 1:
+
+                grouping[index - n_grouped_bins + 1 : index] = -1
+                grouping[index] = 1
+
+            n_grouped_bins = 0
+
+        else:
+
+            if not bin_open:
+
+                bin_open = True
+
+                starts.append(index)
+                n = 0
+
+            n += b
+
+            n_grouped_bins += 1
+
+            if n >= min_value_per_bin:
+
+                stops.append(index + 1)
+
+                n = 0
+
+                bin_open = False
+
+                if n_grouped_bins > 1:
+
+                    grouping[index - n_grouped_bins + 1 : index] = -1
+                    grouping[index] = 1
+
+                n_grouped_bins = 0
+
+    if bin_open:
+
+        stops.append(len(vector_to_rebin_on))
+
+    return np.array(starts), np.array(stops), grouping
+
+
+def _masks(n_channels):
+
+    rng = np.random.default_rng(1234)
+
+    # several excluded ranges, so that the selection is not contiguous
+
+    gapped = np.ones(n_channels, dtype=bool)
+    gapped[:5] = False
+    gapped[40:55] = False
+    gapped[100:101] = False
+    gapped[-7:] = False
+
+    return [None, gapped, rng.uniform(size=n_channels) > 0.3]
+
+
+@pytest.mark.parametrize("min_value_per_bin", [1, 5, 30])
+@pytest.mark.parametrize("mask_index", [0, 1, 2])
+def test_rebinner_scan_against_reference(min_value_per_bin, mask_index):
+
+    rng = np.random.default_rng(4321)
+
+    n_channels = 128
+
+    counts = rng.poisson(3.0, n_channels)
+
+    mask = _masks(n_channels)[mask_index]
+
+    rebinner = Rebinner(counts, min_value_per_bin, mask=mask)
+
+    if mask is None:
+
+        mask = np.ones(n_channels, dtype=bool)
+
+    starts, stops, grouping = _reference_scan(counts, min_value_per_bin, mask)
+
+    assert rebinner.n_bins == starts.shape[0]
+
+    assert np.array_equal(rebinner._starts, starts)
+    assert np.array_equal(rebinner._stops, stops)
+
+    assert np.array_equal(rebinner.grouping, grouping)
+
+
+def test_rebinner_grouping_for_many_channels():
+
+    # the grouping only holds the OGIP flags, whatever the number of channels
+
+    n_channels = 70000
+
+    counts = np.ones(n_channels, dtype=np.int64)
+
+    rebinner = Rebinner(counts, 3)
+
+    starts, stops, grouping = _reference_scan(
+        counts, 3, np.ones(n_channels, dtype=bool)
+    )
+
+    assert np.array_equal(rebinner.grouping, grouping)
+
+    assert set(np.unique(rebinner.grouping)) <= {-1, 0, 1}
+
+
+def _per_bin(rebinner, vector, reduce):
+
+    return np.array(
+        [
+            reduce(np.asarray(vector)[start:stop])
+            for start, stop in zip(rebinner._starts, rebinner._stops)
+        ]
+    )
+
+
+def _gapped_counts():
+
+    rng = np.random.default_rng(1234)
+
+    counts = rng.poisson(2.0, 100)
+
+    # a run of empty channels in the middle and at the end,
+    # so that some bins only hold zeros
+
+    counts[30:50] = 0
+    counts[-10:] = 0
+
+    mask = np.ones(100, dtype=bool)
+    mask[10:20] = False
+    mask[60:61] = False
+
+    return counts, mask
+
+
+def test_rebin_stacked_against_per_bin_sums():
+
+    counts, mask = _gapped_counts()
+
+    rebinner = Rebinner(counts, 5, mask=mask)
+
+    rng = np.random.default_rng(4321)
+
+    int_vector = counts.astype(np.int32)
+    float_vector = rng.uniform(0, 10, 100)
+    empty_vector = np.zeros(100)
+
+    # mixed integers and floats each keep their kind, so that Poisson
+    # counts rebinned with scaled counts are still integers
+
+    rebinned = rebinner.rebin(int_vector, float_vector, empty_vector)
+
+    assert np.issubdtype(rebinned[0].dtype, np.integer)
+
+    assert np.array_equal(rebinned[0], _per_bin(rebinner, int_vector, np.sum))
+
+    for vector, result in zip([float_vector, empty_vector], rebinned[1:]):
+
+        assert result.dtype == np.float64
+
+        assert np.allclose(result, _per_bin(rebinner, vector, np.sum))
+
+    # only integers stay integers
+
+    rebinned = rebinner.rebin(int_vector, counts)
+
+    for vector, result in zip([int_vector, counts], rebinned):
+
+        assert np.issubdtype(result.dtype, np.integer)
+
+        assert np.array_equal(result, _per_bin(rebinner, vector, np.sum))
+
+    # a single vector goes through the compiled kernels
+
+    (result,) = rebinner.rebin(int_vector)
+
+    assert np.array_equal(result, _per_bin(rebinner, int_vector, np.sum))
+
+    (result,) = rebinner.rebin(float_vector)
+
+    assert np.allclose(result, _per_bin(rebinner, float_vector, np.sum))
+
+
+def test_rebin_errors_against_per_bin_sums():
+
+    counts, mask = _gapped_counts()
+
+    rebinner = Rebinner(counts, 5, mask=mask)
+
+    rng = np.random.default_rng(4321)
+
+    errors = [
+        np.sqrt(counts),
+        counts.astype(np.int32),
+        rng.uniform(0, 1, 100),
+        np.zeros(100),
+    ]
+
+    rebinned = rebinner.rebin_errors(*errors)
+
+    for error, result in zip(errors, rebinned):
+
+        assert np.allclose(
+            result,
+            _per_bin(rebinner, error, lambda x: np.sqrt(np.sum(np.square(x, dtype=float)))),
+        )
+
+
+def _scalar_only(getter):
+
+    # float() fails on arrays, so the binner falls back to the event loop
+
+    return lambda start, stop: float(getter(start, stop))
+
+
+def _edges(bins):
+
+    if bins is None:
+
+        return None
+
+    return np.array(bins.start_times), np.array(bins.stop_times)
+
+
+@pytest.mark.parametrize("with_errors", [False, True])
+def test_bin_by_significance_batched_against_scalar(with_errors, monkeypatch):
+
+    rng = np.random.default_rng(1234)
+
+    arrival_times = np.sort(rng.uniform(0, 100, 1000))
+
+    def background_getter(start, stop):
+
+        return 1.0 * (np.asarray(stop) - start)
+
+    def background_error_getter(start, stop):
+
+        return np.sqrt(background_getter(start, stop))
+
+    error_getter = background_error_getter if with_errors else None
+
+    assert TemporalBinner._accepts_arrays(
+        arrival_times, background_getter, error_getter
+    )
+
+    assert not TemporalBinner._accepts_arrays(
+        arrival_times,
+        _scalar_only(background_getter),
+        _scalar_only(background_error_getter) if with_errors else None,
+    )
+
+    # record where the threshold is crossed in each block of the batched
+    # search, so that we know every case was compared
+
+    significance_at_stops = TemporalBinner._significance_at_stops
+
+    crossings = set()
+
+    min_counts = None
+
+    def recording_significance(start, stops, counts, *getters):
+
+        sigma = significance_at_stops(start, stops, counts, *getters)
+
+        exceeded = np.flatnonzero((counts >= min_counts) & (sigma >= 3))
+
+        if exceeded.shape[0] == 0:
+
+            crossings.add("never")
+
+        elif exceeded[0] == stops.shape[0] - 1:
+
+            crossings.add("boundary")
+
+        else:
+
+            crossings.add("inside")
+
+        return sigma
+
+    monkeypatch.setattr(
+        TemporalBinner, "_significance_at_stops", staticmethod(recording_significance)
+    )
+
+    # the background is low, so the bins close as soon as they reach
+    # min_counts. Scanning it moves the crossing across the first block
+
+    for min_counts in list(range(1, 55, 6)) + list(range(55, 80)) + [2000]:
+
+        batched = TemporalBinner.bin_by_significance(
+            arrival_times,
+            background_getter,
+            error_getter,
+            sigma_level=3,
+            min_counts=min_counts,
+        )
+
+        scalar = TemporalBinner.bin_by_significance(
+            arrival_times,
+            _scalar_only(background_getter),
+            _scalar_only(background_error_getter) if with_errors else None,
+            sigma_level=3,
+            min_counts=min_counts,
+        )
+
+        if scalar is None:
+
+            assert batched is None
+
+        else:
+
+            batched_starts, batched_stops = _edges(batched)
+            scalar_starts, scalar_stops = _edges(scalar)
+
+            assert np.allclose(batched_starts, scalar_starts)
+            assert np.allclose(batched_stops, scalar_stops)
+
+    assert crossings == {"inside", "boundary", "never"}
@@ -7,7 +7,9 @@ import pytest
 from .conftest import get_test_datasets_directory
 from threeML.io.file_utils import within_directory
 from threeML.utils.time_interval import TimeIntervalSet
-from threeML.utils.time_series.event_list import EventListWithDeadTime, EventList
+from threeML.utils.time_series.event_list import (EventList,
+                                                  EventListWithDeadTime,
+                                                  EventListWithDeadTimeFraction)
 
 __this_dir__ = os.path.join(os.path.abspath(os.path.dirname(__file__)))
 datasets_dir = get_test_datasets_directory()
@@ -126,3 +128,107 @@ def test_binned_fit(event_time_series):
     assert evt_list._poly_counts.sum() > 0
 
     evt_list.__repr__()
+
+
+# overlapping intervals, intervals without events and
+# boundaries falling exactly on event times
+_starts = np.array([0.0, 5.0, 3.0, 12.5, 80.0, 20.0, 41.3, 0.0])
+_stops = np.array([10.0, 15.0, 3.0, 12.5, 90.0, 20.3, 60.0, 100.0])
+
+
+def _random_events(sort, seed=1234):
+
+    rng = np.random.default_rng(seed)
+
+    # times on a coarse grid, so that events share time stamps
+    # and fall on the interval boundaries
+
+    arrival_times = np.round(rng.uniform(0, 70, 2000), 1)
+
+    if sort:
+
+        arrival_times.sort()
+
+    return (
+        arrival_times,
+        rng.integers(0, 8, arrival_times.shape[0]),
+        rng.uniform(0, 1e-3, arrival_times.shape[0]),
+    )
+
+
+@pytest.mark.parametrize("sort", [True, False])
+def test_batched_counts_against_single_intervals(sort):
+
+    arrival_times, measurement, _ = _random_events(sort)
+
+    evt_list = EventList(
+        arrival_times=arrival_times,
+        measurement=measurement,
+        n_channels=8,
+        start_time=0,
+        stop_time=100,
+    )
+
+    counts = evt_list.count_per_channel_over_intervals(_starts, _stops)
+
+    assert counts.shape == (_starts.shape[0], 8)
+
+    for i, (start, stop) in enumerate(zip(_starts, _stops)):
+
+        assert np.array_equal(
+            counts[i], evt_list.count_per_channel_over_interval(start, stop)
+        )
+
+
+@pytest.mark.parametrize("sort", [True, False])
+def test_batched_dead_time_exposure_against_single_intervals(sort):
+
+    arrival_times, measurement, dead_time = _random_events(sort)
+
+    evt_list = EventListWithDeadTime(
+        arrival_times=arrival_times,
+        measurement=measurement,
+        n_channels=8,
+        start_time=0,
+        stop_time=100,
+        dead_time=dead_time,
+    )
+
+    exposure = evt_list.exposure_over_intervals(_starts, _stops)
+
+    assert np.allclose(
+        exposure,
+        [evt_list.exposure_over_interval(a, b) for a, b in zip(_starts, _stops)],
+    )
+
+    # the empty intervals have no dead time
+
+    assert exposure[4] == _stops[4] - _starts[4]
+
+
+@pytest.mark.parametrize("sort", [True, False])
+def test_batched_dead_time_fraction_exposure_against_single_intervals(sort):
+
+    arrival_times, measurement, dead_time = _random_events(sort)
+
+    evt_list = EventListWithDeadTimeFraction(
+        arrival_times=arrival_times,
+        measurement=measurement,
+        n_channels=8,
+        start_time=0,
+        stop_time=100,
+        dead_time_fraction=dead_time * 100,
+    )
+
+    # the mean fraction of an interval without events is undefined
+    # in both cases
+
+    with np.errstate(invalid="ignore"):
+
+        exposure = evt_list.exposure_over_intervals(_starts, _stops)
+
+        single = [
+            evt_list.exposure_over_interval(a, b) for a, b in zip(_starts, _stops)
+        ]
+
+    assert np.allclose(exposure, single, equal_nan=True)
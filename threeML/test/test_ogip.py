@@ -1,5 +1,6 @@
 from builtins import range
 from builtins import object
+import copy
 import pytest
 import os
 import numpy.testing as npt
@@ -17,10 +18,27 @@ __this_dir__ = os.path.join(os.path.abspath(os.path.dirname(__file__)))
 __example_dir = get_test_datasets_directory()
 
 
+@pytest.fixture(scope="module")
+def base_ogip():
+
+    # parse the PHA/BAK/RSP files only once per module. Tests
+    # work on a deep copy so that they can freely change the plugin
+
+    with within_directory(__example_dir):
+        ogip = OGIPLike("test_ogip", observation="test.pha{1}")
+
+    return ogip
+
+
 class AnalysisBuilder(object):
     def __init__(self, plugin):
         self._plugin = plugin
 
+        # all the likelihoods share the same plugin, so the data list
+        # is built only once
+
+        self._data_list = DataList(self._plugin)
+
         self._shapes = {}
         self._shapes["normal"] = Powerlaw
         self._shapes["cpl"] = Cutoff_powerlaw
@@ -32,26 +50,24 @@ class AnalysisBuilder(object):
     def get_jl(self, key):
         assert key in self._shapes
 
-        data_list = DataList(self._plugin)
-
         ps = PointSource("test", 0, 0, spectral_shape=self._shapes[key]())
         model = Model(ps)
-        jl = JointLikelihood(model, data_list, verbose=False)
+        jl = JointLikelihood(model, self._data_list, verbose=False)
         jl.set_minimizer("minuit")
 
         return jl
 
 
-def test_loading_a_generic_pha_file():
+def test_loading_a_generic_pha_file(base_ogip):
 
     with within_directory(__example_dir):
-        ogip = OGIPLike("test_ogip", observation="test.pha{1}")
+        ogip = copy.deepcopy(base_ogip)
 
         pha_info = ogip.get_pha_files()
 
         assert ogip.name == "test_ogip"
-        assert ogip.n_data_points == sum(ogip._mask)
-        assert sum(ogip._mask) == ogip.n_data_points
+        assert ogip.n_data_points == int(ogip._mask.sum())
+        assert int(ogip._mask.sum()) == ogip.n_data_points
         assert ogip.tstart == 0.0
         assert ogip.tstop == 9.95012
         assert "cons_test_ogip" in ogip.nuisance_parameters
@@ -73,8 +89,8 @@ def test_loading_a_loose_ogip_pha_file():
         pha_info = ogip.get_pha_files()
 
         assert ogip.name == "test_ogip"
-        assert ogip.n_data_points == sum(ogip._mask)
-        assert sum(ogip._mask) == ogip.n_data_points
+        assert ogip.n_data_points == int(ogip._mask.sum())
+        assert int(ogip._mask.sum()) == ogip.n_data_points
         # assert ogip.tstart is None
         # assert ogip.tstop is None
         assert "cons_test_ogip" in ogip.nuisance_parameters
@@ -102,10 +118,10 @@ def test_loading_bad_keywords_file():
         ogip.__repr__()
 
 
-def test_pha_files_in_generic_ogip_constructor_spec_number_in_file_name():
+def test_pha_files_in_generic_ogip_constructor_spec_number_in_file_name(base_ogip):
     with within_directory(__example_dir):
 
-        ogip = OGIPLike("test_ogip", observation="test.pha{1}")
+        ogip = copy.deepcopy(base_ogip)
         ogip.set_active_measurements("all")
         pha_info = ogip.get_pha_files()
 
@@ -125,7 +141,7 @@ def test_pha_files_in_generic_ogip_constructor_spec_number_in_file_name():
         assert pha_info["pha"].rate_errors is None
 
         assert (
-            sum(pha_info["pha"].sys_errors == np.zeros_like(pha_info["pha"].rates))
+            np.count_nonzero(pha_info["pha"].sys_errors == 0)
             == pha_info["bak"].n_channels
         )
 
@@ -169,7 +185,7 @@ def test_pha_files_in_generic_ogip_constructor_spec_number_in_file_name():
         assert len(pha_info["bak"].rate_errors) == pha_info["bak"].n_channels
 
         assert (
-            sum(pha_info["bak"].sys_errors == np.zeros_like(pha_info["pha"].rates))
+            np.count_nonzero(pha_info["bak"].sys_errors == 0)
             == pha_info["bak"].n_channels
         )
 
@@ -201,7 +217,7 @@ def test_pha_files_in_generic_ogip_constructor_spec_number_in_arguments():
         assert pha_info["pha"].rate_errors is None
 
         assert (
-            sum(pha_info["pha"].sys_errors == np.zeros_like(pha_info["pha"].rates))
+            np.count_nonzero(pha_info["pha"].sys_errors == 0)
             == pha_info["bak"].n_channels
         )
         assert (
@@ -242,7 +258,7 @@ def test_pha_files_in_generic_ogip_constructor_spec_number_in_arguments():
         assert len(pha_info["bak"].rate_errors) == pha_info["bak"].n_channels
 
         assert (
-            sum(pha_info["bak"].sys_errors == np.zeros_like(pha_info["pha"].rates))
+            np.count_nonzero(pha_info["bak"].sys_errors == 0)
             == pha_info["bak"].n_channels
         )
 
@@ -251,35 +267,35 @@ def test_pha_files_in_generic_ogip_constructor_spec_number_in_arguments():
         assert isinstance(pha_info["rsp"], OGIPResponse)
 
 
-def test_ogip_energy_selection():
+def test_ogip_energy_selection(base_ogip):
     with within_directory(__example_dir):
-        ogip = OGIPLike("test_ogip", observation="test.pha{1}")
+        ogip = copy.deepcopy(base_ogip)
 
-        assert sum(ogip._mask) == sum(ogip.quality.good)
+        assert int(ogip._mask.sum()) == int(ogip.quality.good.sum())
 
         # Test that  selecting a subset reduces the number of data points
         ogip.set_active_measurements("10-30")
 
-        assert sum(ogip._mask) == ogip.n_data_points
-        assert sum(ogip._mask) < 128
+        assert int(ogip._mask.sum()) == ogip.n_data_points
+        assert int(ogip._mask.sum()) < 128
 
         # Test selecting all channels
         ogip.set_active_measurements("all")
 
-        assert sum(ogip._mask) == ogip.n_data_points
-        assert sum(ogip._mask) == 128
+        assert int(ogip._mask.sum()) == ogip.n_data_points
+        assert int(ogip._mask.sum()) == 128
 
         # Test channel setting
         ogip.set_active_measurements(exclude=["c0-c1"])
 
-        assert sum(ogip._mask) == ogip.n_data_points
-        assert sum(ogip._mask) == 126
+        assert int(ogip._mask.sum()) == ogip.n_data_points
+        assert int(ogip._mask.sum()) == 126
 
         # Test mixed ene/chan setting
         ogip.set_active_measurements(exclude=["0-c1"], verbose=True)
 
-        assert sum(ogip._mask) == ogip.n_data_points
-        assert sum(ogip._mask) == 126
+        assert int(ogip._mask.sum()) == ogip.n_data_points
+        assert int(ogip._mask.sum()) == 126
 
         # Test that energies cannot be input backwards
         with pytest.raises(RuntimeError):
@@ -299,12 +315,12 @@ def test_ogip_energy_selection():
 
         ogip.set_active_measurements("reset")
 
-        assert sum(ogip._mask) == sum(ogip.quality.good)
+        assert int(ogip._mask.sum()) == int(ogip.quality.good.sum())
 
 
-def test_ogip_rebinner():
+def test_ogip_rebinner(base_ogip):
     with within_directory(__example_dir):
-        ogip = OGIPLike("test_ogip", observation="test.pha{1}")
+        ogip = copy.deepcopy(base_ogip)
 
         n_data_points = 128
         ogip.set_active_measurements("all")
@@ -327,19 +343,19 @@ def test_ogip_rebinner():
         ogip.view_count_spectrum()
 
 
-def test_various_effective_area():
+def test_various_effective_area(base_ogip):
     with within_directory(__example_dir):
-        ogip = OGIPLike("test_ogip", observation="test.pha{1}")
+        ogip = copy.deepcopy(base_ogip)
 
         ogip.use_effective_area_correction()
 
         ogip.fix_effective_area_correction()
 
 
-def test_simulating_data_sets():
+def test_simulating_data_sets(base_ogip):
     with within_directory(__example_dir):
 
-        ogip = OGIPLike("test_ogip", observation="test.pha{1}")
+        ogip = copy.deepcopy(base_ogip)
 
         with pytest.raises(RuntimeError):
             _ = ogip.simulated_parameters
@@ -358,8 +374,8 @@ def test_simulating_data_sets():
         assert ogip._n_synthetic_datasets == 1
         assert new_ogip.n_data_points == n_data_points
 
-        assert new_ogip.n_data_points == sum(new_ogip._mask)
-        assert sum(new_ogip._mask) == new_ogip.n_data_points
+        assert new_ogip.n_data_points == int(new_ogip._mask.sum())
+        assert int(new_ogip._mask.sum()) == new_ogip.n_data_points
         assert new_ogip.tstart == 0.0
 
         assert "cons_sim" in new_ogip.nuisance_parameters
@@ -375,7 +391,7 @@ def test_simulating_data_sets():
         del ogip
         del new_ogip
 
-        ogip = OGIPLike("test_ogip", observation="test.pha{1}")
+        ogip = copy.deepcopy(base_ogip)
 
         ab = AnalysisBuilder(ogip)
         _ = ab.get_jl("normal")
@@ -389,13 +405,13 @@ def test_simulating_data_sets():
         for i, ds in enumerate(sim_data_sets):
 
             assert ds.name == "sim%d" % i
-            assert sum(ds._mask) == sum(ogip._mask)
+            assert int(ds._mask.sum()) == int(ogip._mask.sum())
             assert ds._rebinner is None
 
 
-def test_likelihood_ratio_test():
+def test_likelihood_ratio_test(base_ogip):
     with within_directory(__example_dir):
-        ogip = OGIPLike("test_ogip", observation="test.pha{1}")
+        ogip = copy.deepcopy(base_ogip)
 
         ogip.set_active_measurements("all")
 
@@ -494,10 +510,10 @@ def test_swift_gbm():
         _ = display_spectrum_model_counts(jl, step=False)
 
 
-def test_pha_write():
+def test_pha_write(base_ogip):
     with within_directory(__example_dir):
 
-        ogip = OGIPLike("test_ogip", observation="test.pha{1}")
+        ogip = copy.deepcopy(base_ogip)
 
         ogip.write_pha("test_write", overwrite=True)
 
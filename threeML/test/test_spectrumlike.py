@@ -182,6 +182,34 @@ def test_spectrumlike_fit():
     )
 
 
+def test_rebinned_poisson_background_likelihood():
+
+    energies = np.logspace(1, 3, 51)
+
+    spectrum_generator = SpectrumLike.from_function(
+        "fake",
+        source_function=Blackbody(K=1e-1, kT=20.0),
+        background_function=Powerlaw(K=1, index=-1.5, piv=100.0),
+        energy_min=energies[:-1],
+        energy_max=energies[1:],
+    )
+
+    spectrum_generator.set_model(
+        Model(PointSource("mysource", 0, 0, spectral_shape=Blackbody()))
+    )
+
+    # the Poisson background counts are rebinned together with the
+    # scaled ones and must stay integers for the likelihood
+
+    spectrum_generator.rebin_on_background(5)
+
+    assert np.issubdtype(
+        spectrum_generator._current_background_counts.dtype, np.integer
+    )
+
+    assert np.isfinite(spectrum_generator.get_log_like())
+
+
 def test_dispersionspectrumlike_fit():
 
     response = OGIPResponse(get_path_of_data_file("datasets/ogip_powerlaw.rsp"))
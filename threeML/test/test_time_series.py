@@ -5,12 +5,18 @@ import pytest
 from threeML.io.file_utils import within_directory
 from threeML.utils.time_interval import TimeIntervalSet
 from threeML.utils.time_series.event_list import EventListWithDeadTime, EventList
+from threeML.utils.spectrum.binned_spectrum import BinnedSpectrum
+from threeML.utils.spectrum.binned_spectrum_set import BinnedSpectrumSet
+from threeML.utils.time_series.binned_spectrum_series import BinnedSpectrumSeries
+from threeML.utils.time_series.polynomial import Polynomial
+from threeML.utils.time_series.time_series import _integrate_channels
 from threeML.utils.data_builders.time_series_builder import TimeSeriesBuilder
 from threeML.io.file_utils import within_directory
 from threeML.plugins.DispersionSpectrumLike import DispersionSpectrumLike
 from threeML.plugins.OGIPLike import OGIPLike
 from .conftest import get_test_datasets_directory
 import astropy.io.fits as fits
+import h5py
 from threeML import debug_mode
 
 
@@ -58,6 +64,26 @@ def test_event_list_constructor():
     assert evt_list._mission == "UNKNOWN"
 
 
+def test_polynomial_integral_of_arrays():
+
+    poly = Polynomial.from_previous_fit(
+        [1.0, 0.5, 0.1], np.array([[0.1, 0.01, 0.0], [0.01, 0.05, 0.0], [0.0, 0.0, 0.01]])
+    )
+
+    stops = np.array([1.0, 2.5, 10.0])
+
+    counts = poly.integral(0.5, stops)
+    errors = poly.integral_error(0.5, stops)
+
+    assert counts.shape == stops.shape
+    assert errors.shape == stops.shape
+
+    for stop, count, error in zip(stops, counts, errors):
+
+        assert np.isclose(poly.integral(0.5, stop), count)
+        assert np.isclose(poly.integral_error(0.5, stop), error)
+
+
 def test_unbinned_fit(event_time_series):
 
     start, stop = 0, 50
@@ -420,3 +446,396 @@ def test_read_lle():
         assert new_errors == old_errors
 
         assert old_tmin_list == new_tmin_list
+
+
+def _random_event_list(seed, n_channels=4, rate=50.0, start=-10.0, stop=60.0):
+
+    rng = np.random.default_rng(seed)
+
+    n_events = rng.poisson(rate * (stop - start))
+
+    arrival_times = np.sort(rng.uniform(start, stop, n_events))
+
+    return EventListWithDeadTime(
+        arrival_times=arrival_times,
+        measurement=rng.integers(0, n_channels, n_events),
+        n_channels=n_channels,
+        start_time=start,
+        stop_time=stop,
+        dead_time=rng.uniform(0, 1e-5, n_events),
+    )
+
+
+def test_restore_background_onto_different_data(tmp_path):
+
+    evt_list = _random_event_list(1234)
+
+    evt_list.set_background_interval("-10-0", "20-60", unbinned=False)
+
+    file_name = str(tmp_path / "bkg")
+
+    evt_list.save_background(file_name, overwrite=True)
+
+    # restore onto data with other events and dead time
+
+    other = _random_event_list(4321, rate=80.0)
+
+    other.restore_fit(file_name + ".h5")
+
+    starts = np.array(other.bkg_intervals.start_times)
+    stops = np.array(other.bkg_intervals.stop_times)
+
+    assert np.array_equal(
+        other._bkg_selected_counts,
+        other.count_per_channel_over_intervals(starts, stops).sum(axis=0),
+    )
+
+    assert np.isclose(
+        other._bkg_exposure, other.exposure_over_intervals(starts, stops).sum()
+    )
+
+    assert not np.array_equal(
+        other._bkg_selected_counts, evt_list._bkg_selected_counts
+    )
+
+
+def test_grade_cache_is_bounded():
+
+    evt_list = _random_event_list(1234)
+
+    n_keys = evt_list._grade_cache_size + 2
+
+    for i in range(n_keys):
+
+        evt_list._remember_grade_search(("binned", str(i), False), [float(i)])
+
+    assert len(evt_list._grade_cache) == evt_list._grade_cache_size
+
+    # the oldest searches are the ones forgotten
+
+    assert ("binned", "0", False) not in evt_list._grade_cache
+
+    assert evt_list._current_grade_key == ("binned", str(n_keys - 1), False)
+
+
+def test_restored_fit_reuses_grade_search(tmp_path, monkeypatch):
+
+    evt_list = _random_event_list(1234)
+
+    evt_list.set_background_interval("-10-0", "20-60", unbinned=False)
+
+    file_name = str(tmp_path / "bkg")
+
+    evt_list.save_background(file_name, overwrite=True)
+
+    restored = _random_event_list(1234)
+
+    restored.restore_fit(file_name + ".h5")
+
+    assert restored._current_grade_key == evt_list._current_grade_key
+
+    assert list(restored._grade_cache) == [evt_list._current_grade_key]
+
+    # refitting the same data must not search the grades again
+
+    def no_grade_search(*args, **kwargs):
+
+        raise AssertionError("the grade search was not reused")
+
+    monkeypatch.setattr(
+        "threeML.utils.time_series.time_series.polyfit", no_grade_search
+    )
+
+    restored.set_background_interval("-10-0", "20-60", unbinned=False)
+
+    assert restored._optimal_polynomial_grade == evt_list._optimal_polynomial_grade
+
+
+def _mixed_degree_polynomials(seed, degrees=(0, 1, 2, 3, 1, 0)):
+
+    # polynomials of several degrees with random positive definite
+    # covariances, so that the stacked arrays are padded with zeros
+
+    rng = np.random.default_rng(seed)
+
+    polynomials = []
+
+    for degree in degrees:
+
+        coefficients = rng.normal(0, 1, degree + 1) / 10.0 ** np.arange(degree + 1)
+
+        a = rng.normal(0, 0.1, (degree + 1, degree + 1))
+
+        polynomials.append(
+            Polynomial.from_previous_fit(coefficients, a.dot(a.T))
+        )
+
+    return polynomials
+
+
+def test_total_poly_count_and_error_against_polynomials():
+
+    evt_list = _random_event_list(1234, n_channels=6)
+
+    polynomials = _mixed_degree_polynomials(1234)
+
+    evt_list._polynomials = polynomials
+
+    starts = np.array([-5.0, 0.0, 3.5, 10.0])
+    stops = np.array([-1.0, 2.0, 4.0, 30.0])
+
+    masks = [None, slice(1, 4), np.array([True, False, True, True, False, True])]
+
+    for mask in masks:
+
+        selected = (
+            polynomials
+            if mask is None
+            else list(np.array(polynomials, dtype=object)[mask])
+        )
+
+        for start, stop in zip(starts, stops):
+
+            assert np.isclose(
+                evt_list.get_total_poly_count(start, stop, mask=mask),
+                sum(p.integral(start, stop) for p in selected),
+            )
+
+            assert np.isclose(
+                evt_list.get_total_poly_error(start, stop, mask=mask),
+                np.sqrt(sum(p.integral_error(start, stop) ** 2 for p in selected)),
+            )
+
+        # the light curves ask for all the bins at once
+
+        assert np.allclose(
+            evt_list.get_total_poly_count(starts, stops, mask=mask),
+            [sum(p.integral(a, b) for p in selected) for a, b in zip(starts, stops)],
+        )
+
+        assert np.allclose(
+            evt_list.get_total_poly_error(starts, stops, mask=mask),
+            [
+                np.sqrt(sum(p.integral_error(a, b) ** 2 for p in selected))
+                for a, b in zip(starts, stops)
+            ],
+        )
+
+
+def test_integrate_channels_against_polynomials():
+
+    polynomials = _mixed_degree_polynomials(4321)
+
+    evt_list = _random_event_list(1234, n_channels=len(polynomials))
+
+    evt_list._polynomials = polynomials
+
+    coefficients, covariances = evt_list._get_polynomial_arrays()
+
+    # several intervals of different lengths, one of them far from zero
+
+    starts = np.array([-10.0, -0.5, 1.0, 7.25, 40.0])
+    stops = np.array([-2.0, 0.5, 1.0, 9.0, 55.0])
+
+    counts, errors = _integrate_channels(coefficients, covariances, starts, stops)
+
+    assert np.allclose(
+        counts,
+        [sum(p.integral(a, b) for a, b in zip(starts, stops)) for p in polynomials],
+    )
+
+    assert np.allclose(
+        errors,
+        [
+            np.sqrt(sum(p.integral_error(a, b) ** 2 for a, b in zip(starts, stops)))
+            for p in polynomials
+        ],
+    )
+
+    # a single interval is the plain integral
+
+    counts, errors = _integrate_channels(
+        coefficients, covariances, starts[3:4], stops[3:4]
+    )
+
+    assert np.allclose(counts, [p.integral(starts[3], stops[3]) for p in polynomials])
+
+    assert np.allclose(
+        errors, [p.integral_error(starts[3], stops[3]) for p in polynomials]
+    )
+
+
+def test_binned_series_batched_selection_against_single_intervals():
+
+    rng = np.random.default_rng(1234)
+
+    # contiguous 1 s bins with different exposures
+
+    edges = np.arange(0.0, 31.0)
+
+    spectra = [
+        BinnedSpectrum(
+            counts=rng.poisson(20, 4),
+            exposure=rng.uniform(0.8, 1.0),
+            ebounds=np.linspace(10.0, 100.0, 5),
+            is_poisson=True,
+            tstart=a,
+            tstop=b,
+        )
+        for a, b in zip(edges[:-1], edges[1:])
+    ]
+
+    series = BinnedSpectrumSeries(
+        BinnedSpectrumSet(
+            spectra,
+            time_intervals=TimeIntervalSet.from_starts_and_stops(edges[:-1], edges[1:]),
+        ),
+        verbose=False,
+    )
+
+    # the intervals partially overlap the bins at one or both ends,
+    # lie inside a single bin, cover everything or overlap each other
+
+    starts = np.array([2.5, 0.0, 10.1, 29.5, -5.0, 3.0, 4.0])
+    stops = np.array([5.5, 30.0, 10.2, 40.0, 0.5, 8.0, 12.7])
+
+    counts = series.count_per_channel_over_intervals(starts, stops)
+    exposures = series.exposure_over_intervals(starts, stops)
+
+    for i, (start, stop) in enumerate(zip(starts, stops)):
+
+        assert np.array_equal(
+            series._select_bins_over_intervals(starts, stops)[i],
+            series._select_bins(start, stop),
+        )
+
+        assert np.allclose(counts[i], series.count_per_channel_over_interval(start, stop))
+
+        assert np.isclose(exposures[i], series.exposure_over_interval(start, stop))
+
+
+def test_save_background_in_single_precision(tmp_path):
+
+    evt_list = _random_event_list(1234)
+
+    evt_list.set_background_interval("-10-0", "20-60", unbinned=False)
+
+    file_name = str(tmp_path / "bkg")
+
+    evt_list.save_background(file_name, overwrite=True, dtype=np.float32)
+
+    restored = _random_event_list(1234)
+
+    restored.restore_fit(file_name + ".h5")
+
+    coefficients, covariances = evt_list._get_polynomial_arrays()
+    restored_coefficients, restored_covariances = restored._get_polynomial_arrays()
+
+    # the polynomials work in double precision again
+
+    assert restored_coefficients.dtype == np.float64
+    assert restored_covariances.dtype == np.float64
+
+    assert all(p.coefficients.dtype == np.float64 for p in restored.polynomials)
+
+    eps = np.finfo(np.float32).eps
+
+    assert np.allclose(restored_coefficients, coefficients, rtol=eps, atol=0)
+    assert np.allclose(restored_covariances, covariances, rtol=eps, atol=0)
+
+    assert np.isclose(
+        restored.get_total_poly_count(0.0, 10.0),
+        evt_list.get_total_poly_count(0.0, 10.0),
+        rtol=1e-5,
+    )
+
+    assert np.isfinite(restored.get_total_poly_error(0.0, 10.0))
+
+
+def test_restore_legacy_background_file(tmp_path):
+
+    evt_list = _random_event_list(1234)
+
+    evt_list.set_background_interval("-10-0", "20-60", unbinned=False)
+
+    coefficients, covariances = evt_list._get_polynomial_arrays()
+
+    # the layout written before the selections became a dataset: no
+    # poly_selections dataset, no grade searches and no background counts
+
+    file_name = tmp_path / "legacy_bkg.h5"
+
+    with h5py.File(file_name, "w") as store:
+
+        store.create_dataset("coefficients", data=np.array(coefficients))
+        store.create_dataset("covariance", data=np.array(covariances))
+
+        store.attrs["poly_order"] = evt_list._optimal_polynomial_grade
+        store.attrs["poly_selections"] = list(
+            zip(
+                evt_list.bkg_intervals.start_times,
+                evt_list.bkg_intervals.stop_times,
+            )
+        )
+        store.attrs["unbinned"] = evt_list._unbinned
+        store.attrs["fit_method"] = evt_list._fit_method_info["fit method"]
+
+    restored = _random_event_list(1234)
+
+    restored.restore_fit(str(file_name))
+
+    assert restored.bkg_intervals == evt_list.bkg_intervals
+
+    restored_coefficients, restored_covariances = restored._get_polynomial_arrays()
+
+    assert np.array_equal(restored_coefficients, coefficients)
+    assert np.array_equal(restored_covariances, covariances)
+
+    assert restored._current_grade_key is None
+
+    assert np.array_equal(restored._bkg_selected_counts, evt_list._bkg_selected_counts)
+
+    assert np.isclose(restored._bkg_exposure, evt_list._bkg_exposure)
+
+    restored.set_active_time_intervals("0-10")
+
+    assert restored._poly_counts.sum() > 0
+
+
+def test_failed_save_background_keeps_existing_file(tmp_path, monkeypatch):
+
+    evt_list = _random_event_list(1234)
+
+    evt_list.set_background_interval("-10-0", "20-60", unbinned=False)
+
+    file_name = tmp_path / "bkg.h5"
+
+    evt_list.save_background(str(file_name))
+
+    original = file_name.read_bytes()
+
+    # the target exists, so it is only replaced if asked for
+
+    with pytest.raises(IOError):
+
+        evt_list.save_background(str(file_name))
+
+    assert file_name.read_bytes() == original
+
+    def failing_write(store, dtype):
+
+        store.create_dataset("coefficients", data=np.zeros(3))
+
+        raise RuntimeError("write failed")
+
+    monkeypatch.setattr(evt_list, "_write_background", failing_write)
+
+    with pytest.raises(RuntimeError):
+
+        evt_list.save_background(str(file_name), overwrite=True)
+
+    # the existing background is untouched and nothing is left behind
+
+    assert file_name.read_bytes() == original
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["bkg.h5"]
@@ -4,7 +4,7 @@
 import sys
 
 from threeML.utils.progress_bar import tqdm
-import numexpr
+import numba as nb
 import numpy as np
 
 
@@ -33,10 +33,10 @@ def bayesian_blocks_not_unique(tt, ttstart, ttstop, p0):
 
     edges = np.concatenate([[tstart], 0.5 * (unique_t[1:] + unique_t[:-1]), [tstop]])
 
-    # The last block length is 0 by definition
+    # The last block length is 0 by definition, so only the others are checked
     block_length = tstop - edges
 
-    if np.sum((block_length <= 0)) > 1:
+    if np.any(block_length[:-1] <= 0):
         raise RuntimeError(
             "Events appears to be out of order! Check for order, or duplicated events."
         )
@@ -58,14 +58,20 @@ def bayesian_blocks_not_unique(tt, ttstart, ttstop, p0):
 
     # Speed tricks: resolve once for all the functions which will be used
     # in the loop
-    cumsum = np.cumsum
     log = np.log
-    argmax = np.argmax
-    numexpr_evaluate = numexpr.evaluate
-    arange = np.arange
+    subtract = np.subtract
+    multiply = np.multiply
+    divide = np.divide
+
+    # cumulative number of events up to each cell, so that the number of
+    # events in the blocks ending at R is cumulative_x[R + 1] - cumulative_x[:R + 1]
+    cumulative_x = np.concatenate([[0], np.cumsum(x)]).astype(float)
 
-    # Decide the step for reporting progress
-    incr = max(int(float(N) / 100.0 * 10), 1)
+    # scratch buffers reused at every iteration, so that no temporary
+    # array is allocated in the loop
+    T_k_buffer = np.empty(N, dtype=float)
+    N_k_buffer = np.empty(N, dtype=float)
+    A_R_buffer = np.empty(N, dtype=float)
 
     logger.debug("Finding blocks...")
 
@@ -73,71 +79,40 @@ def bayesian_blocks_not_unique(tt, ttstart, ttstop, p0):
     # This loop has been optimized for speed:
     # * the expression for the fitness function has been rewritten to
     #  avoid multiple log computations, and to avoid power computations
-    # * the use of scipy.weave and numexpr has been evaluated. The latter
-    #  gives a big gain (~40%) if used for the fitness function. No other
-    #  gain is obtained by using it anywhere else
-
-    # Set numexpr precision to low (more than enough for us), which is
-    # faster than high
-    oldaccuracy = numexpr.set_vml_accuracy_mode("low")
-    numexpr.set_num_threads(1)
-    numexpr.set_vml_num_threads(1)
+    # * all the vector operations write into pre-allocated buffers
 
-    
+    # refresh the progress bar about 100 times in total
 
-    for R in tqdm(range(N)):
+    for R in tqdm(range(N), miniters=max(1, N // 100)):
         br = block_length[R + 1]
-        T_k = block_length[: R + 1] - br
+
+        T_k = T_k_buffer[: R + 1]
+        subtract(block_length[: R + 1], br, out=T_k)
 
         # N_k: number of elements in each block
-        # This expression has been simplified for the case of
-        # unbinned events (i.e., one element in each block)
-        # It was:
-        N_k = cumsum(x[: R + 1][::-1])[::-1]
-        # Now it is:
-        # N_k = arange(R + 1, 0, -1)
-
-        # Evaluate fitness function
-        # This is the slowest part, which I'm speeding up by using
-        # numexpr. It provides a ~40% gain in execution speed.
-
-        fit_vec = numexpr_evaluate(
-            """N_k * log(N_k/ T_k) """,
-            optimization="aggressive",
-            local_dict={"N_k": N_k, "T_k": T_k},
-        )
+        N_k = N_k_buffer[: R + 1]
+        subtract(cumulative_x[R + 1], cumulative_x[: R + 1], out=N_k)
 
-        p = priors[R]
+        # Evaluate fitness function N_k * log(N_k/ T_k)
 
-        A_R = fit_vec - p
+        A_R = A_R_buffer[: R + 1]
+        divide(N_k, T_k, out=A_R)
+        log(A_R, out=A_R)
+        multiply(A_R, N_k, out=A_R)
+
+        A_R -= priors[R]
 
         A_R[1:] += best[:R]
 
-        i_max = argmax(A_R)
+        i_max = A_R.argmax()
 
         last[R] = i_max
         best[R] = A_R[i_max]
 
-        
-
-    numexpr.set_vml_accuracy_mode(oldaccuracy)
-
     logger.debug("Done\n")
 
     # Now find blocks
-    change_points = np.zeros(N, dtype=int)
-    i_cp = N
-    ind = N
-    while True:
-        i_cp -= 1
-        change_points[i_cp] = ind
-
-        if ind == 0:
-            break
-
-        ind = last[ind - 1]
-
-    change_points = change_points[i_cp:]
+    change_points = _find_change_points(last)
 
     finalEdges = edges[change_points]
 
@@ -173,7 +148,7 @@ def bayesian_blocks(tt, ttstart, ttstop, p0, bkg_integral_distribution=None):
         logger.debug(
             "Transforming the inhomogeneous Poisson process to a homogeneous one with rate 1..."
         )
-        t = np.array(bkg_integral_distribution(tt))
+        t = np.asarray(bkg_integral_distribution(tt), dtype=float)
         logger.debug("done")
 
         # Now compute the start and stop time in the new system
@@ -187,19 +162,18 @@ def bayesian_blocks(tt, ttstart, ttstop, p0, bkg_integral_distribution=None):
         tstop = ttstop
 
     # Create initial cell edges (Voronoi tessellation)
-    edges = np.concatenate([[t[0]], 0.5 * (t[1:] + t[:-1]), [t[-1]]])
+    edges = _voronoi_edges(t)
 
     # Create the edges also in the original time system
-    edges_ = np.concatenate([[tt[0]], 0.5 * (tt[1:] + tt[:-1]), [tt[-1]]])
-
-    # Create a lookup table to be able to transform back from the transformed system
-    # to the original one
-    lookup_table = {key: value for (key, value) in zip(edges, edges_)}
+    edges_ = _voronoi_edges(tt)
 
     # The last block length is 0 by definition
     block_length = tstop - edges
 
-    if np.sum((block_length <= 0)) > 1:
+    # here the last edge is the last event, which can be before tstop,
+    # so a single non-positive length is allowed anywhere
+
+    if np.count_nonzero(block_length <= 0) > 1:
 
         raise RuntimeError(
             "Events appears to be out of order! Check for order, or duplicated events."
@@ -220,76 +194,61 @@ def bayesian_blocks(tt, ttstart, ttstop, p0, bkg_integral_distribution=None):
     # This loop has been optimized for speed:
     # * the expression for the fitness function has been rewritten to
     #  avoid multiple log computations, and to avoid power computations
-    # * the use of scipy.weave and numexpr has been evaluated. The latter
-    #  gives a big gain (~40%) if used for the fitness function. No other
-    #  gain is obtained by using it anywhere else
+    # * since N_k follows a fixed schedule for unbinned events, the term
+    #  N_k * log(N_k) is pre-computed once
+    # * the whole dynamic programming loop is compiled with numba, so
+    #  that no temporary array is created at each iteration
 
-    # Set numexpr precision to low (more than enough for us), which is
-    # faster than high
-    oldaccuracy = numexpr.set_vml_accuracy_mode("low")
-    numexpr.set_num_threads(1)
-    numexpr.set_vml_num_threads(1)
+    n_log_n = np.zeros(N + 1)
+    n_log_n[1:] = np.arange(1, N + 1) * np.log(np.arange(1, N + 1))
 
-    # Speed tricks: resolve once for all the functions which will be used
-    # in the loop
-    numexpr_evaluate = numexpr.evaluate
-    numexpr_re_evaluate = numexpr.re_evaluate
+    _find_best_blocks(block_length, prior, n_log_n, best, last)
 
-    # Pre-compute this
+    logger.debug("Done\n")
 
-    aranges = np.arange(N + 1, 0, -1)
+    # Now peel off and find the blocks (see the algorithm in Scargle et al.)
+    change_points = _find_change_points(last)
 
-    for R in range(N):
-        br = block_length[R + 1]
-        T_k = (
-            block_length[: R + 1] - br
-        )  # this looks like it is not used, but it actually is,
-        # inside the numexpr expression
+    # Transform the found edges back into the original time system. The edges in
+    # the two systems are in the same positions, so we can just index them
 
-        # N_k: number of elements in each block
-        # This expression has been simplified for the case of
-        # unbinned events (i.e., one element in each block)
-        # It was:
-        # N_k = cumsum(x[:R + 1][::-1])[::-1]
-        # Now it is:
-        N_k = aranges[N - R :]
-        # where aranges has been pre-computed
+    if bkg_integral_distribution is not None:
 
-        # Evaluate fitness function
-        # This is the slowest part, which I'm speeding up by using
-        # numexpr. It provides a ~40% gain in execution speed.
+        final_edges = edges_[change_points]
 
-        # The first time we need to "compile" the expression in numexpr,
-        # all the other times we can reuse it
+    else:
 
-        if R == 0:
+        final_edges = edges[change_points]
 
-            fit_vec = numexpr_evaluate(
-                """N_k * log(N_k/ T_k) """,
-                optimization="aggressive",
-                local_dict={"N_k": N_k, "T_k": T_k},
-            )
+    # Now fix the first and last edge so that they are tstart and tstop
+    final_edges[0] = ttstart
+    final_edges[-1] = ttstop
 
-        else:
+    return np.asarray(final_edges)
 
-            fit_vec = numexpr_re_evaluate(local_dict={"N_k": N_k, "T_k": T_k})
 
-        A_R = fit_vec - prior  # type: np.ndarray
+def _find_change_points(last):
+    """
+    peel off the change points from the array of the last change point of
+    the optimal partition of each prefix (see the algorithm in Scargle et al.)
+    """
 
-        A_R[1:] += best[:R]
+    N = last.shape[0]
 
-        i_max = A_R.argmax()
+    # first count the change points, so that we allocate only what we need
 
-        last[R] = i_max
-        best[R] = A_R[i_max]
+    n_change_points = 1
+    ind = N
 
-    numexpr.set_vml_accuracy_mode(oldaccuracy)
+    while ind > 0:
 
-    logger.debug("Done\n")
+        n_change_points += 1
 
-    # Now peel off and find the blocks (see the algorithm in Scargle et al.)
-    change_points = np.zeros(N, dtype=int)
-    i_cp = N
+        ind = last[ind - 1]
+
+    change_points = np.empty(n_change_points, dtype=int)
+
+    i_cp = n_change_points
     ind = N
 
     while True:
@@ -304,25 +263,66 @@ def bayesian_blocks(tt, ttstart, ttstop, p0, bkg_integral_distribution=None):
 
         ind = last[ind - 1]
 
-    change_points = change_points[i_cp:]
+    return change_points
 
-    edg = edges[change_points]
 
-    # Transform the found edges back into the original time system
+def _voronoi_edges(t):
+    """
+    the edges of the cells around each of the (sorted) times t,
+    the first and last edge being the first and last time
+    """
 
-    if bkg_integral_distribution is not None:
+    edges = np.empty(t.shape[0] + 1, dtype=float)
 
-        final_edges = [lookup_table[x] for x in edg]
+    edges[0] = t[0]
+    edges[-1] = t[-1]
 
-    else:
+    # the midpoints are written directly in place
 
-        final_edges = edg
+    np.add(t[1:], t[:-1], out=edges[1:-1])
+    edges[1:-1] *= 0.5
 
-    # Now fix the first and last edge so that they are tstart and tstop
-    final_edges[0] = ttstart
-    final_edges[-1] = ttstop
+    return edges
 
-    return np.asarray(final_edges)
+
+@nb.njit(cache=True)
+def _find_best_blocks(block_length, prior, n_log_n, best, last):
+    """
+    the Scargle et al. 2012 optimal partitioning for unbinned events,
+    filling best and last in place. fastmath is not used as the fitness
+    can legitimately be infinite for coincident events
+    """
+
+    N = best.shape[0]
+
+    for R in range(N):
+
+        br = block_length[R + 1]
+
+        best_value = -np.inf
+        i_max = 0
+
+        for k in range(R + 1):
+
+            # number of events in the block starting at cell k
+            N_k = R + 1 - k
+
+            # fitness N_k * log(N_k / T_k) plus the best configuration
+            # for the cells before the block
+
+            A_R = n_log_n[N_k] - N_k * np.log(block_length[k] - br) - prior
+
+            if k > 0:
+
+                A_R += best[k - 1]
+
+            if A_R > best_value or k == 0:
+
+                best_value = A_R
+                i_max = k
+
+        last[R] = i_max
+        best[R] = best_value
 
 
 # To be run with a profiler
@@ -23,6 +23,12 @@ class Rebinner:
 
     """
 
+    # check that the rebinned vectors preserve the total of the masked
+    # elements. This can only fail if the rebinning is buggy, so it is
+    # off by default (the test suite turns it on)
+
+    _verify: bool = False
+
     def __init__(self, vector_to_rebin_on, min_value_per_bin, mask=None):
 
         # Basic check that it is possible to do what we have been requested to do
@@ -54,99 +60,32 @@ class Rebinner:
 
         self._mask = mask
 
-        # Rebin taking the mask into account
-
-        self._starts = []
-        self._stops = []
-        self._grouping = np.zeros_like(vector_to_rebin_on)
-
-        n = 0
-        bin_open = False
-
-        n_grouped_bins = 0
-
-        for index, b in enumerate(vector_to_rebin_on):
-
-            if not mask[index]:
-
-                # This element is excluded by the mask
-
-                if not bin_open:
-
-                    # Do nothing
-                    continue
-
-                else:
-
-                    # We need to close the bin here
-                    self._stops.append(index)
-                    n = 0
-                    bin_open = False
-
-                    # If we have grouped more than one bin
-
-                    if n_grouped_bins > 1:
-
-                        # group all these bins
-                        self._grouping[index - n_grouped_bins + 1 : index] = -1
-                        self._grouping[index] = 1
-
-                    # reset the number of bins in this group
-
-                    n_grouped_bins = 0
-
-            else:
-
-                # This element is included by the mask
-
-                if not bin_open:
-                    # Open a new bin
-                    bin_open = True
-
-                    self._starts.append(index)
-                    n = 0
-
-                # Add the current value to the open bin
-
-                n += b
-
-                n_grouped_bins += 1
+        # Rebin taking the mask into account. The scan is sequential
+        # (each bin depends on where the previous one was closed),
+        # so it is done in a compiled kernel
 
-                # If we are beyond the requested value, close the bin
+        vector_to_rebin_on = np.asarray(vector_to_rebin_on)
 
-                if n >= min_value_per_bin:
-                    self._stops.append(index + 1)
+        # the grouping only holds the OGIP flags -1, 0 and 1 whatever the
+        # number of channels, so the smallest integer holds it. It is
+        # written as the 16 bit GROUPING column
 
-                    n = 0
+        self._grouping = np.zeros(len(vector_to_rebin_on), dtype=np.int8)
 
-                    bin_open = False
-
-                    # If we have grouped more than one bin
-
-                    if n_grouped_bins > 1:
-
-                        # group all these bins
-                        self._grouping[index - n_grouped_bins + 1 : index] = -1
-                        self._grouping[index] = 1
-
-                    # reset the number of bins in this group
-
-                    n_grouped_bins = 0
-
-        # At the end of the loop, see if we left a bin open, if we did, close it
-
-        if bin_open:
-            self._stops.append(len(vector_to_rebin_on))
-
-        assert len(self._starts) == len(self._stops), (
-            "This is a bug: the starts and stops of the bins are not in " "equal number"
+        self._starts, self._stops = _scan_bins(
+            vector_to_rebin_on, mask, min_value_per_bin, self._grouping
         )
 
         self._min_value_per_bin = min_value_per_bin
 
         self._n_bins = len(self._starts)
-        self._starts = np.array(self._starts)
-        self._stops = np.array(self._stops)
+
+        # interleaved starts and stops, so that np.add.reduceat sums each bin
+        # in its even elements even when the bins are not contiguous
+
+        self._reduceat_index = np.empty(2 * self._n_bins, dtype=np.int64)
+        self._reduceat_index[0::2] = self._starts
+        self._reduceat_index[1::2] = self._stops
 
         log.debug(
             f"Vector was rebinned from {len(vector_to_rebin_on)} to {self._n_bins}"
@@ -169,8 +108,6 @@ class Rebinner:
 
     def rebin(self, *vectors):
 
-        rebinned_vectors = []
-
         for vector in vectors:
 
             assert len(vector) == len(self._mask), (
@@ -178,13 +115,32 @@ class Rebinner:
                 "original (not-rebinned) vector"
             )
 
-            # Transform in array because we need to use the mask
+        if len(vectors) > 1:
+
+            # rebin all the vectors at once, as the rows of a 2D array
 
-            if vector.dtype == np.int64:
+            return self._rebin_stacked(vectors)
+
+        rebinned_vectors = []
+
+        for vector in vectors:
+
+            # Transform in array because we need to use the mask.
+            # Integer counts of any width stay integers, and the kernels
+            # are compiled only for int64 and float64
+
+            vector = np.asarray(vector)
+
+            if np.issubdtype(vector.dtype, np.integer):
 
                 rebinned_vectors.append(
                     _rebin_vector_int(
-                        vector, self._starts, self._stops, self._mask, self._n_bins
+                        np.ascontiguousarray(vector, dtype=np.int64),
+                        self._starts,
+                        self._stops,
+                        self._mask,
+                        self._n_bins,
+                        self._verify,
                     )
                 )
 
@@ -192,12 +148,65 @@ class Rebinner:
 
                 rebinned_vectors.append(
                     _rebin_vector_float(
-                        vector, self._starts, self._stops, self._mask, self._n_bins
+                        np.ascontiguousarray(vector, dtype=np.float64),
+                        self._starts,
+                        self._stops,
+                        self._mask,
+                        self._n_bins,
+                        self._verify,
                     )
                 )
 
         return rebinned_vectors
 
+    def _rebin_stacked(self, vectors):
+        """
+        rebin several vectors with a segmented sum over the rows of a
+        2D array. Integer and float vectors are stacked separately, so
+        that each rebinned vector keeps the kind of its input
+        """
+
+        is_integer = [
+            np.issubdtype(np.asarray(vector).dtype, np.integer) for vector in vectors
+        ]
+
+        rebinned_vectors = [None] * len(vectors)
+
+        for integer, dtype in ((True, np.int64), (False, np.float64)):
+
+            rows = [i for i, flag in enumerate(is_integer) if flag == integer]
+
+            if not rows:
+
+                continue
+
+            # the last stop can be the length of the vectors, which reduceat
+            # does not accept as an index, so we pad with a column of zeros
+
+            stacked = np.zeros((len(rows), len(self._mask) + 1), dtype=dtype)
+
+            for k, i in enumerate(rows):
+
+                stacked[k, :-1] = vectors[i]
+
+            rebinned = np.add.reduceat(stacked, self._reduceat_index, axis=1)[:, 0::2]
+
+            if self._verify:
+
+                test = np.abs(
+                    (rebinned.sum(axis=1) + 1e-100)
+                    / (stacked[:, :-1].sum(axis=1, where=self._mask) + 1e-100)
+                    - 1
+                )
+
+                assert np.all(test < 1e-4)
+
+            for k, i in enumerate(rows):
+
+                rebinned_vectors[i] = rebinned[k]
+
+        return rebinned_vectors
+
     def rebin_errors(self, *vectors):
         """
         Rebin errors by summing the squares
@@ -210,35 +219,36 @@ class Rebinner:
 
         """
 
-        rebinned_vectors = []
+        # all the vectors are rebinned at once, as the rows of a 2D array.
+        # The last stop can be the length of the vectors, which reduceat
+        # does not accept as an index, so we pad with a column of zeros
+
+        squares = np.zeros((len(vectors), len(self._mask) + 1))
 
-        for vector in vectors:  # type: np.ndarray[np.ndarray]
+        for i, vector in enumerate(vectors):  # type: np.ndarray[np.ndarray]
 
             assert len(vector) == len(self._mask), (
                 "The vector to rebin must have the same number of elements of the"
                 "original (not-rebinned) vector"
             )
 
-            rebinned_vector = []
+            np.square(vector, out=squares[i, :-1])
 
-            for low_bound, hi_bound in zip(self._starts, self._stops):
+        # the sums of the squares are computed in a new array,
+        # so we can take the square root in place
 
-                rebinned_vector.append(np.sqrt(np.sum(vector[low_bound:hi_bound] ** 2)))
+        rebinned = np.add.reduceat(squares, self._reduceat_index, axis=1)[:, 0::2]
 
-            rebinned_vectors.append(np.array(rebinned_vector))
+        np.sqrt(rebinned, out=rebinned)
 
-        return rebinned_vectors
+        return list(rebinned)
 
     def get_new_start_and_stop(self, old_start, old_stop):
 
         assert len(old_start) == len(self._mask) and len(old_stop) == len(self._mask)
 
-        new_start = np.zeros(len(self._starts))
-        new_stop = np.zeros(len(self._starts))
-
-        for i, (low_bound, hi_bound) in enumerate(zip(self._starts, self._stops)):
-            new_start[i] = old_start[low_bound]
-            new_stop[i] = old_stop[hi_bound - 1]
+        new_start = np.asarray(old_start, dtype=float)[self._starts]
+        new_stop = np.asarray(old_stop, dtype=float)[self._stops - 1]
 
         return new_start, new_stop
 
@@ -274,6 +284,8 @@ class TemporalBinner(TimeIntervalSet):
         :return:
         """
 
+        arrival_times = np.ascontiguousarray(arrival_times, dtype=float)
+
         if tstart is None:
 
             tstart = arrival_times.min()
@@ -340,6 +352,16 @@ class TemporalBinner(TimeIntervalSet):
         # resolve once for functions used in the loop
         searchsorted = np.searchsorted
 
+        # if the background can be evaluated for many stop times at once,
+        # the slow search evaluates the significance for blocks of
+        # events instead of one event at a time
+
+        batched_search = TemporalBinner._accepts_arrays(
+            arrival_times, background_getter, background_error_getter
+        )
+
+        n_events = arrival_times.shape[0]
+
         # this is the main loop
         # as long as we have not reached the end of the interval
         # the loop will run
@@ -427,37 +449,38 @@ class TemporalBinner(TimeIntervalSet):
             if threeML_config.interface.progress_bars:
                 pbar.update(counts)
 
-            for time in arrival_times[start_idx:]:
-
-                total_counts += 1
-                if threeML_config.interface.progress_bars:
-                    pbar.update(1)
-                if total_counts < min_counts:
+            if batched_search:
 
-                    continue
+                block_size = 64
 
-                else:
+                while start_idx < n_events:
 
-                    # first use the background function to know the number of background counts
-                    bkg = background_getter(current_start, time)
+                    stop_idx = min(start_idx + block_size, n_events)
 
-                    sig = Significance(total_counts, bkg)
+                    times = arrival_times[start_idx:stop_idx]
 
-                    if background_error_getter is not None:
+                    counts_at_stop = total_counts + np.arange(1, times.shape[0] + 1)
 
-                        bkg_error = background_error_getter(current_start, time)
+                    sigma = TemporalBinner._significance_at_stops(
+                        current_start,
+                        times,
+                        counts_at_stop,
+                        background_getter,
+                        background_error_getter,
+                    )
 
-                        sigma = sig.li_and_ma_equivalent_for_gaussian_background(
-                            bkg_error
-                        )[0]
+                    exceeded = np.flatnonzero(
+                        (counts_at_stop >= min_counts) & (sigma >= sigma_level)
+                    )
 
-                    else:
+                    if exceeded.shape[0] > 0:
 
-                        sigma = sig.li_and_ma()[0]
+                        idx = exceeded[0]
 
-                        # now test if we have enough sigma
+                        if threeML_config.interface.progress_bars:
+                            pbar.update(idx + 1)
 
-                    if sigma >= sigma_level:
+                        time = times[idx]
 
                         # if we succeeded we want to mark the time bins
                         stops.append(time)
@@ -472,9 +495,77 @@ class TemporalBinner(TimeIntervalSet):
 
                         end_fast_search = False
 
-                        # get out of the for loop
                         break
 
+                    if threeML_config.interface.progress_bars:
+                        pbar.update(times.shape[0])
+
+                    total_counts = counts_at_stop[-1]
+
+                    start_idx = stop_idx
+
+                    # the bins are usually short, so start with small
+                    # blocks and grow them if we have to go further
+
+                    block_size *= 2
+
+            else:
+
+                # the progress bar is updated once at the end of the search,
+                # so that we do not query the configuration at each event
+
+                n_searched = 0
+
+                for time in arrival_times[start_idx:]:
+
+                    total_counts += 1
+                    n_searched += 1
+                    if total_counts < min_counts:
+
+                        continue
+
+                    else:
+
+                        # first use the background function to know the number of background counts
+                        bkg = background_getter(current_start, time)
+
+                        sig = Significance(total_counts, bkg)
+
+                        if background_error_getter is not None:
+
+                            bkg_error = background_error_getter(current_start, time)
+
+                            sigma = sig.li_and_ma_equivalent_for_gaussian_background(
+                                bkg_error
+                            )[0]
+
+                        else:
+
+                            sigma = sig.li_and_ma()[0]
+
+                            # now test if we have enough sigma
+
+                        if sigma >= sigma_level:
+
+                            # if we succeeded we want to mark the time bins
+                            stops.append(time)
+
+                            starts.append(current_start)
+
+                            # set up the next fast search
+                            # by looking past this interval
+                            current_start = time
+
+                            current_stop = 0.5 * (arrival_times[-1] + time)
+
+                            end_fast_search = False
+
+                            # get out of the for loop
+                            break
+
+                if threeML_config.interface.progress_bars:
+                    pbar.update(n_searched)
+
             # if we never exceeded the sigma level by the
             # end of the search, we never will
             if end_fast_search:
@@ -501,9 +592,18 @@ class TemporalBinner(TimeIntervalSet):
         :return: None
         """
 
-        tmp = np.arange(arrival_times[0], arrival_times[-1], dt)
-        starts = tmp
-        stops = tmp + dt
+        arrival_times = np.ascontiguousarray(arrival_times, dtype=float)
+
+        # compute all the edges from their index, which avoids the rounding
+        # accumulated by np.arange on floats. Starts and stops are views
+        # of the same array. The number of bins is the same as np.arange
+
+        n_bins = int(np.ceil((arrival_times[-1] - arrival_times[0]) / dt))
+
+        edges = arrival_times[0] + dt * np.arange(n_bins + 1)
+
+        starts = edges[:-1]
+        stops = edges[1:]
 
         return cls.from_starts_and_stops(starts, stops)
 
@@ -535,6 +635,8 @@ class TemporalBinner(TimeIntervalSet):
 
         """
 
+        arrival_times = np.ascontiguousarray(arrival_times, dtype=float)
+
         try:
 
             final_edges = bayesian_blocks(
@@ -627,6 +729,67 @@ class TemporalBinner(TimeIntervalSet):
 
             return False
 
+    @staticmethod
+    def _accepts_arrays(arrival_times, background_getter, background_error_getter=None):
+        """
+        check if the background (and its error) can be computed for an array
+        of stop times in a single call
+
+        :param arrival_times:
+        :param background_getter:
+        :param background_error_getter:
+        :return: bool
+        """
+
+        test_stops = arrival_times[-2:]
+
+        try:
+
+            getters = [background_getter]
+
+            if background_error_getter is not None:
+
+                getters.append(background_error_getter)
+
+            for getter in getters:
+
+                if np.shape(getter(arrival_times[0], test_stops)) != test_stops.shape:
+
+                    return False
+
+        except Exception:
+
+            return False
+
+        return True
+
+    @staticmethod
+    def _significance_at_stops(
+        start, stops, counts, background_getter, background_error_getter=None
+    ):
+        """
+        the significance of the intervals from start to each of the stops
+
+        :param start:
+        :param stops: array of stop times
+        :param counts: array with the counts in each interval
+        :param background_getter:
+        :param background_error_getter:
+        :return: array of sigmas
+        """
+
+        sig = Significance(counts, background_getter(start, stops))
+
+        if background_error_getter is not None:
+
+            return sig.li_and_ma_equivalent_for_gaussian_background(
+                background_error_getter(start, stops)
+            )
+
+        else:
+
+            return sig.li_and_ma()
+
     @staticmethod
     def _select_events(arrival_times, start, stop):
         """
@@ -647,8 +810,106 @@ class TemporalBinner(TimeIntervalSet):
 
 
 #####
+@nb.njit(cache=True)
+def _scan_bins(vector, mask, min_value_per_bin, grouping):
+    """
+    find the starts and stops of the bins with at least min_value_per_bin
+    in the elements selected by the mask, filling the grouping in place
+    """
+
+    n_elements = vector.shape[0]
+
+    # there cannot be more bins than elements
+
+    starts = np.empty(n_elements, dtype=np.int64)
+    stops = np.empty(n_elements, dtype=np.int64)
+
+    n_bins = 0
+
+    n = 0.0
+    bin_open = False
+
+    n_grouped_bins = 0
+
+    for index in range(n_elements):
+
+        if not mask[index]:
+
+            # This element is excluded by the mask
+
+            if bin_open:
+
+                # We need to close the bin here
+                stops[n_bins] = index
+                n_bins += 1
+
+                n = 0.0
+                bin_open = False
+
+                # If we have grouped more than one bin
+
+                if n_grouped_bins > 1:
+
+                    # group all these bins
+                    grouping[index - n_grouped_bins + 1 : index] = -1
+                    grouping[index] = 1
+
+                # reset the number of bins in this group
+
+                n_grouped_bins = 0
+
+        else:
+
+            # This element is included by the mask
+
+            if not bin_open:
+
+                # Open a new bin
+                bin_open = True
+
+                starts[n_bins] = index
+                n = 0.0
+
+            # Add the current value to the open bin
+
+            n += vector[index]
+
+            n_grouped_bins += 1
+
+            # If we are beyond the requested value, close the bin
+
+            if n >= min_value_per_bin:
+
+                stops[n_bins] = index + 1
+                n_bins += 1
+
+                n = 0.0
+                bin_open = False
+
+                # If we have grouped more than one bin
+
+                if n_grouped_bins > 1:
+
+                    # group all these bins
+                    grouping[index - n_grouped_bins + 1 : index] = -1
+                    grouping[index] = 1
+
+                # reset the number of bins in this group
+
+                n_grouped_bins = 0
+
+    # At the end of the loop, see if we left a bin open, if we did, close it
+
+    if bin_open:
+
+        stops[n_bins] = n_elements
+        n_bins += 1
+
+    return starts[:n_bins].copy(), stops[:n_bins].copy()
+
+
 @nb.njit(fastmath=True)
-def _rebin_vector_float(vector, start, stop, mask, N):
+def _rebin_vector_float(vector, start, stop, mask, N, verify):
     """
     faster rebinner using numba
     """
@@ -660,15 +921,17 @@ def _rebin_vector_float(vector, start, stop, mask, N):
 
     arr = rebinned_vector.arr
 
-    test = np.abs((np.sum(arr) + 1e-100) / (np.sum(vector[mask]) + 1e-100) - 1)
+    if verify:
+
+        test = np.abs((np.sum(arr) + 1e-100) / (np.sum(vector[mask]) + 1e-100) - 1)
 
-    assert test < 1e-4
+        assert test < 1e-4
 
     return arr
 
 
 @nb.njit(fastmath=True)
-def _rebin_vector_int(vector, start, stop, mask, N):
+def _rebin_vector_int(vector, start, stop, mask, N, verify):
     """
     faster rebinner using numba
     """
@@ -680,8 +943,10 @@ def _rebin_vector_int(vector, start, stop, mask, N):
 
     arr = rebinned_vector.arr
 
-    test = np.abs((np.sum(arr) + 1e-100) / (np.sum(vector[mask]) + 1e-100) - 1)
+    if verify:
+
+        test = np.abs((np.sum(arr) + 1e-100) / (np.sum(vector[mask]) + 1e-100) - 1)
 
-    assert test < 1e-4
+        assert test < 1e-4
 
     return arr
@@ -451,7 +451,7 @@ class TimeSeriesBuilder(object):
 
         return self._time_series.get_poly_info()
 
-    def save_background(self, file_name: str, overwrite=False) -> None:
+    def save_background(self, file_name: str, overwrite=False, dtype=None) -> None:
         """
 
         save the background to and HDF5 file. The filename does not need an extension.
@@ -461,12 +461,14 @@ class TimeSeriesBuilder(object):
 
         :param file_name: name of file to save
         :param overwrite: to overwrite or not
+        :param dtype: the float type of the stored polynomials
+        (e.g. np.float32 for smaller files). Defaults to double precision
         :return:
         """
 
         file_name: Path = sanitize_filename(file_name)
 
-        self._time_series.save_background(file_name, overwrite)
+        self._time_series.save_background(file_name, overwrite, dtype=dtype)
 
         log.info(f"Saved background to {file_name}")
 
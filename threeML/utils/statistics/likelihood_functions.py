@@ -18,7 +18,7 @@ def regularized_log(vector):
     return np.where(vector > 0, np.log(vector), 0)
 
 
-@njit(fastmath=True, parallel=False)
+@njit(fastmath=True, parallel=False, cache=True)
 def xlogy(x, y):
     """
     A function which is 0 if x is 0, and x * log(y) otherwise. This is to fix the fact that for a machine
@@ -39,7 +39,7 @@ def xlogy(x, y):
     return out
 
 
-@njit(fastmath=True, parallel=False)
+@njit(fastmath=True, parallel=False, cache=True)
 def xlogy_one(x, y):
     """
     A function which is 0 if x is 0, and x * log(y) otherwise. This is to fix the fact that for a machine
@@ -55,7 +55,7 @@ def xlogy_one(x, y):
         return 0.0
 
 
-@njit(fastmath=True)
+@njit(fastmath=True, cache=True)
 def poisson_log_likelihood_ideal_bkg(
     observed_counts, expected_bkg_counts, expected_model_counts
 ):
@@ -149,7 +149,7 @@ def poisson_observed_poisson_background_xs(
     return ppstat * (-1)
 
 
-@njit(fastmath=True)
+@njit(fastmath=True, cache=True)
 def poisson_observed_poisson_background(
     observed_counts, background_counts, exposure_ratio, expected_model_counts
 ):
@@ -205,7 +205,7 @@ def poisson_observed_poisson_background(
     return loglike, B_mle * alpha
 
 
-@njit(fastmath=True)
+@njit(fastmath=True, cache=True)
 def poisson_observed_gaussian_background(
     observed_counts, background_counts, background_error, expected_model_counts
 ):
@@ -265,7 +265,7 @@ def poisson_observed_gaussian_background(
     return log_likes, b
 
 
-@njit(fastmath=True)
+@njit(fastmath=True, cache=True)
 def half_chi2(y, yerr, expectation):
 
     # This is half of a chi2. The reason for the factor of two is that we need this to be the Gaussian likelihood,
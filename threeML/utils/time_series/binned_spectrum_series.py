@@ -170,15 +170,14 @@ class BinnedSpectrumSeries(TimeSeries):
 
         if self.poly_fit_exists:
 
-            bkg = []
-            for j, time_bin in enumerate(bins):
-                tmpbkg = 0.0
-                for poly in self.polynomials[use_echans_start:use_echans_stop+1]:
-
-                    tmpbkg += poly.integral(time_bin.start_time, time_bin.stop_time)
-                    
-                
-                bkg.append(tmpbkg/width[j])
+            # integrate the polynomials of the selected channels
+            # over all the bins at once
+
+            bkg = self.get_total_poly_count(
+                np.array(bins.start_times),
+                np.array(bins.stop_times),
+                mask=slice(use_echans_start, use_echans_stop + 1),
+            ) / np.array(width)
                 
             
             
@@ -263,6 +262,38 @@ class BinnedSpectrumSeries(TimeSeries):
 
         return total_counts
 
+    def count_per_channel_over_intervals(self, starts, stops):
+        """
+        return the counts per channel in each of the given intervals
+
+        :param starts: array of interval starts
+        :param stops: array of interval stops
+        :return: array of shape (n_intervals, n_channels)
+        """
+
+        # the counts of the selected bins are summed with a single
+        # product of the selection masks and the counts of all the bins
+
+        return self._select_bins_over_intervals(starts, stops).dot(
+            self._binned_spectrum_set.counts_per_bin
+        )
+
+    def _select_bins_over_intervals(self, starts, stops):
+        """
+        return the bin selections of the given intervals
+        :param starts: array of start times
+        :param stops: array of stop times
+        :return: float array of shape (n_intervals, n_bins)
+        """
+
+        masks = np.zeros((len(starts), len(self._binned_spectrum_set.time_intervals)))
+
+        for i, (start, stop) in enumerate(zip(starts, stops)):
+
+            masks[i] = self._select_bins(start, stop)
+
+        return masks
+
     def _select_bins(self, start, stop):
         """
         return an index of the selected bins
@@ -453,10 +484,12 @@ class BinnedSpectrumSeries(TimeSeries):
 
         self._time_selection_exists = True
 
+        self._info_cache.clear()
+
         # lets build a time interval set from the selections
         # and then merge intersecting intervals
 
-        time_intervals = TimeIntervalSet.from_strings(*args)
+        time_intervals = self._as_time_interval_set(*args)
         time_intervals.merge_intersecting_intervals(in_place=True)
 
         # lets adjust the time intervals to the actual ones since they are prebinned
@@ -493,37 +526,21 @@ class BinnedSpectrumSeries(TimeSeries):
 
         self._time_intervals = time_intervals
 
-        tmp_counts = []
-        tmp_err = []  # Temporary list to hold the err counts per chan
-
         if self._poly_fit_exists:
 
             if not self._poly_fit_exists:
                 raise RuntimeError(
                     "A polynomial fit to the channels does not exist!")
 
-            for chan in range(self._n_channels):
-
-                total_counts = 0
-                counts_err = 0
-
-                for tmin, tmax in zip(
-                    self._time_intervals.start_times, self._time_intervals.stop_times
-                ):
-                    # Now integrate the appropriate background polynomial
-                    total_counts += self._polynomials[chan].integral(
-                        tmin, tmax)
-                    counts_err += (
-                        self._polynomials[chan].integral_error(tmin, tmax)
-                    ) ** 2
+            # integrate the background polynomials of all the
+            # channels over the selected intervals
 
-                tmp_counts.append(total_counts)
-
-                tmp_err.append(np.sqrt(counts_err))
-
-            self._poly_counts = np.array(tmp_counts)
-
-            self._poly_count_err = np.array(tmp_err)
+            self._poly_counts, self._poly_count_err = (
+                self._integrate_polynomials_over_intervals(
+                    self._time_intervals.start_times,
+                    self._time_intervals.stop_times,
+                )
+            )
 
         self._exposure = self._binned_spectrum_set.exposure_per_bin[all_idx].sum(
         )
@@ -553,3 +570,16 @@ class BinnedSpectrumSeries(TimeSeries):
         mask = self._select_bins(start, stop)
 
         return self._binned_spectrum_set.exposure_per_bin[mask].sum()
+
+    def exposure_over_intervals(self, starts, stops):
+        """
+        calculate the exposure over each of the given intervals
+
+        :param starts: array of start times
+        :param stops:  array of stop times
+        :return: array of exposures
+        """
+
+        return self._select_bins_over_intervals(starts, stops).dot(
+            self._binned_spectrum_set.exposure_per_bin
+        )
@@ -109,6 +109,12 @@ class EventList(TimeSeries):
 
         self._temporal_binner = None
 
+        # the arrival times in time order and the permutation that sorts
+        # them (None if they already are). Found out when first needed
+
+        self._time_sorted = None
+        self._time_order = None
+
         assert (
             self._arrival_times.shape[0] == self._measurement.shape[0]
         ), "Arrival time (%d) and energies (%d) have different shapes" % (
@@ -337,28 +343,22 @@ class EventList(TimeSeries):
 
         if self.poly_fit_exists:
 
-            # we will store the bkg rate for each time bin
-
-            bkg = []
-
-            for j, tb in enumerate(time_bins):
-
-                # zero out the bkg
-                tmpbkg = 0.0
-
-                # sum up the counts over this interval
-
-                for poly in self.polynomials[use_echans_start:use_echans_stop+1]:
+            # sum up the counts of the selected channels over
+            # all the time bins at once
 
-                    tmpbkg += poly.integral(tb[0], tb[1])
+            tmpbkg = self.get_total_poly_count(
+                time_bins[:, 0],
+                time_bins[:, 1],
+                mask=slice(use_echans_start, use_echans_stop + 1),
+            )
 
-                # capture the bkg *rate*
+            # capture the bkg *rate*
 
-                # Divide the background counts by the time intervall
-                # We do not use the dead time corrected exposure here
-                # because the integration is done over the full time bin
-                # and not the dead time corrected exposure
-                bkg.append(old_div(tmpbkg, tb[1]-tb[0]))
+            # Divide the background counts by the time intervall
+            # We do not use the dead time corrected exposure here
+            # because the integration is done over the full time bin
+            # and not the dead time corrected exposure
+            bkg = tmpbkg / (time_bins[:, 1] - time_bins[:, 0])
 
         else:
 
@@ -430,6 +430,33 @@ class EventList(TimeSeries):
 
         return counts_per_channel
 
+    def count_per_channel_over_intervals(self, starts, stops):
+        """
+        return the counts per channel in each of the given intervals
+
+        :param starts: array of interval starts
+        :param stops: array of interval stops
+        :return: array of shape (n_intervals, n_channels)
+        """
+
+        n_intervals = len(starts)
+
+        # the channel of each event selected in each interval, offset so
+        # that a single bincount histograms all the intervals at once
+
+        interval_idx, event_idx = self._events_in_intervals(starts, stops)
+
+        channels = self._measurement[event_idx] - self._first_channel
+
+        valid = (channels >= 0) & (channels < self._n_channels)
+
+        counts = np.bincount(
+            interval_idx[valid] * self._n_channels + channels[valid].astype(np.int64),
+            minlength=n_intervals * self._n_channels,
+        )
+
+        return counts.reshape(n_intervals, self._n_channels).astype(float)
+
     def _select_events(self, start, stop):
         """
         return an index of the selected events
@@ -440,6 +467,100 @@ class EventList(TimeSeries):
 
         return np.logical_and(start <= self._arrival_times, self._arrival_times <= stop)
 
+    def _events_in_intervals(self, starts, stops):
+        """
+        return the indices of the events falling in each interval
+        :param starts: array of start times
+        :param stops: array of stop times
+        :return: interval index and event index of each selected event
+        """
+
+        low, high = self._event_bounds(starts, stops)
+
+        n_selected = high - low
+
+        interval_idx = np.repeat(np.arange(len(n_selected)), n_selected)
+
+        # position of each selected event within its own run
+
+        offsets = np.arange(n_selected.sum()) - np.repeat(
+            np.cumsum(n_selected) - n_selected, n_selected
+        )
+
+        event_idx = np.repeat(low, n_selected) + offsets
+
+        _, time_order = self._time_ordered()
+
+        if time_order is not None:
+
+            # back to the positions of the events in the list
+
+            event_idx = time_order[event_idx]
+
+        return interval_idx, event_idx
+
+    def _event_bounds(self, starts, stops):
+        """
+        in time order, each interval is a contiguous run of events.
+        Find the bounds of the runs of all the intervals at once
+        :param starts: array of start times
+        :param stops: array of stop times
+        :return: low and high indices of each interval in the time ordered events
+        """
+
+        arrival_times, _ = self._time_ordered()
+
+        low = np.searchsorted(
+            arrival_times, np.asarray(starts, dtype=float), side="left"
+        )
+        high = np.searchsorted(
+            arrival_times, np.asarray(stops, dtype=float), side="right"
+        )
+
+        return low, np.maximum(high, low)
+
+    def _cumulative_event_sum(self, values):
+        """
+        sums of values over the events of each run found by
+        _event_bounds are differences of this array
+        :param values: one value per event, in the order of the list
+        :return: array of length n_events + 1
+        """
+
+        _, time_order = self._time_ordered()
+
+        if time_order is not None:
+
+            values = np.asarray(values)[time_order]
+
+        cumulative = np.zeros(len(values) + 1)
+
+        np.cumsum(values, out=cumulative[1:])
+
+        return cumulative
+
+    def _time_ordered(self):
+        """
+        the arrival times in time order, and the permutation that sorts
+        the events (None if they are already sorted). Events are almost
+        always sorted, otherwise they are sorted only once
+        :return: sorted arrival times, permutation
+        """
+
+        if self._time_sorted is None:
+
+            if np.all(self._arrival_times[1:] >= self._arrival_times[:-1]):
+
+                self._time_sorted = self._arrival_times
+
+            else:
+
+                self._time_order = np.argsort(self._arrival_times, kind="stable")
+
+                self._time_sorted = self._arrival_times[self._time_order]
+
+        return self._time_sorted, self._time_order
+
     def _fit_polynomials(self, bayes=False):
         """
 
@@ -752,10 +873,11 @@ class EventList(TimeSeries):
         which will set the energy range 0-10. seconds.
         """
         self._time_selection_exists = True
+        self._info_cache.clear()
 
         interval_masks = []
 
-        time_intervals = TimeIntervalSet.from_strings(*args)
+        time_intervals = self._as_time_interval_set(*args)
 
         time_intervals.merge_intersecting_intervals(in_place=True)
 
@@ -805,37 +927,21 @@ class EventList(TimeSeries):
 
         self._counts = np.array(tmp_counts)
 
-        tmp_counts = []
-        tmp_err = []  # Temporary list to hold the err counts per chan
-
         if self._poly_fit_exists:
 
             if not self._poly_fit_exists:
                 raise RuntimeError(
                     "A polynomial fit to the channels does not exist!")
 
-            for chan in range(self._n_channels):
-
-                total_counts = 0
-                counts_err = 0
-
-                for tmin, tmax in zip(
-                    self._time_intervals.start_times, self._time_intervals.stop_times
-                ):
-                    # Now integrate the appropriate background polynomial
-                    total_counts += self._polynomials[chan].integral(
-                        tmin, tmax)
-                    counts_err += (
-                        self._polynomials[chan].integral_error(tmin, tmax)
-                    ) ** 2
-
-                tmp_counts.append(total_counts)
-
-                tmp_err.append(np.sqrt(counts_err))
-
-            self._poly_counts = np.array(tmp_counts)
+            # integrate the background polynomials of all the
+            # channels over the selected intervals
 
-            self._poly_count_err = np.array(tmp_err)
+            self._poly_counts, self._poly_count_err = (
+                self._integrate_polynomials_over_intervals(
+                    self._time_intervals.start_times,
+                    self._time_intervals.stop_times,
+                )
+            )
 
             # apply the dead time correction to the background counts
             # and errors
@@ -918,6 +1024,10 @@ class EventListWithDeadTime(EventList):
 
             self._dead_time = None
 
+        # built the first time exposures are batched
+
+        self._cumulative_dead_time = None
+
     def exposure_over_interval(self, start, stop):
         """
         calculate the exposure over the given interval
@@ -939,6 +1049,38 @@ class EventListWithDeadTime(EventList):
 
         return (stop - start) - interval_deadtime
 
+    def exposure_over_intervals(self, starts, stops):
+        """
+        calculate the exposure over each of the given intervals
+
+        :param starts: array of start times
+        :param stops:  array of stop times
+        :return: array of exposures
+        """
+
+        starts = np.asarray(starts, dtype=float)
+        stops = np.asarray(stops, dtype=float)
+
+        if self._dead_time is None:
+
+            interval_deadtime = 0
+
+        else:
+
+            if self._cumulative_dead_time is None:
+
+                self._cumulative_dead_time = self._cumulative_event_sum(
+                    self._dead_time
+                )
+
+            low, high = self._event_bounds(starts, stops)
+
+            interval_deadtime = (
+                self._cumulative_dead_time[high] - self._cumulative_dead_time[low]
+            )
+
+        return (stops - starts) - interval_deadtime
+
 
 class EventListWithDeadTimeFraction(EventList):
     def __init__(
@@ -1013,6 +1155,10 @@ class EventListWithDeadTimeFraction(EventList):
 
             self._dead_time_fraction = None
 
+        # built the first time exposures are batched
+
+        self._cumulative_dead_time_fraction = None
+
     def exposure_over_interval(self, start, stop):
         """
         calculate the exposure over the given interval
@@ -1037,6 +1183,43 @@ class EventListWithDeadTimeFraction(EventList):
 
         return interval - interval_deadtime
 
+    def exposure_over_intervals(self, starts, stops):
+        """
+        calculate the exposure over each of the given intervals
+
+        :param starts: array of start times
+        :param stops:  array of stop times
+        :return: array of exposures
+        """
+
+        if self._dead_time_fraction is None:
+
+            return super(EventListWithDeadTimeFraction, self).exposure_over_intervals(
+                starts, stops
+            )
+
+        starts = np.asarray(starts, dtype=float)
+        stops = np.asarray(stops, dtype=float)
+
+        if self._cumulative_dead_time_fraction is None:
+
+            self._cumulative_dead_time_fraction = self._cumulative_event_sum(
+                self._dead_time_fraction
+            )
+
+        low, high = self._event_bounds(starts, stops)
+
+        # the mean dead time fraction of the events in each interval
+
+        mean_fraction = (
+            self._cumulative_dead_time_fraction[high]
+            - self._cumulative_dead_time_fraction[low]
+        ) / (high - low)
+
+        interval = stops - starts
+
+        return interval - mean_fraction * interval
+
 
 class EventListWithLiveTime(EventList):
     def __init__(
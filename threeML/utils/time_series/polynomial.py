@@ -157,18 +157,24 @@ class Polynomial(object):
 
     def _eval_basis(self, x):
 
-        return (1.0 / self._i_plus_1) * np.power(x, self._i_plus_1)
+        # the basis runs along the last axis, so that x can be an array
+
+        return (1.0 / self._i_plus_1) * np.power(
+            np.asarray(x, dtype=float)[..., np.newaxis], self._i_plus_1
+        )
 
     def integral_error(self, xmin, xmax) -> float:
         """
-        computes the integral error of an interval
+        computes the integral error of an interval.
+        xmin and xmax can also be arrays of interval boundaries
+
         :param xmin: start of the interval
         :param xmax: stop of the interval
         :return: interval error
         """
         c = self._eval_basis(xmax) - self._eval_basis(xmin)
-        tmp = c.dot(self._cov_matrix)
-        err2 = tmp.dot(c)
+
+        err2 = np.einsum("...i,ij,...j->...", c, self._cov_matrix, c)
 
         return np.sqrt(err2)
 
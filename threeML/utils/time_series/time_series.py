@@ -2,6 +2,7 @@
 __author__ = "grburgess"
 
 import collections
+import hashlib
 import os
 from dataclasses import dataclass
 from pathlib import Path
@@ -9,14 +10,15 @@ from typing import Iterable, List, Optional
 import warnings
 
 import h5py
+import numba as nb
 import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
 
 from threeML.config.config import threeML_config
 from threeML.config.config_utils import get_value_kwargs
 from threeML.io.file_utils import sanitize_filename
 from threeML.io.logging import setup_logger
-from threeML.parallel.parallel_client import ParallelClient
 from threeML.utils.progress_bar import trange
 from threeML.utils.spectrum.binned_spectrum import Quality
 from threeML.utils.time_interval import TimeIntervalSet
@@ -25,6 +27,90 @@ from threeML.utils.time_series.polynomial import (Polynomial, polyfit,
 
 log = setup_logger(__name__)
 
+# the label recorded for the fit method, keyed on whether the fit is bayesian
+
+_FIT_METHOD_LABEL = {True: "bayes", False: "mle"}
+
+
+def _binned_grade_log_like(bins, cnts, grade, exposure, bayes):
+    """
+    fit the binned counts with a polynomial of the given grade
+    and return the log likelihood
+    """
+
+    _, log_like = polyfit(bins, cnts, grade, exposure, bayes=bayes)
+
+    return log_like
+
+
+def _unbinned_grade_log_like(events, grade, t_start, t_stop, exposure, bayes):
+    """
+    fit the events with a polynomial of the given grade
+    and return the log likelihood
+    """
+
+    _, log_like = unbinned_polyfit(
+        events, grade, t_start, t_stop, exposure, bayes=bayes
+    )
+
+    return log_like
+
+
+@nb.njit(fastmath=True, cache=True)
+def _integrate_channels(coefficients, covariances, starts, stops):
+    """
+    integrate the polynomials of all the channels over each interval.
+    The counts of the intervals are summed, as are the squared errors
+
+    :param coefficients: (n_channels, n_coefficients) array
+    :param covariances: (n_channels, n_coefficients, n_coefficients) array
+    :param starts: interval starts
+    :param stops: interval stops
+    :returns: counts and errors per channel
+    """
+
+    n_channels, n_coefficients = coefficients.shape
+
+    counts = np.zeros(n_channels)
+    variances = np.zeros(n_channels)
+
+    basis = np.empty(n_coefficients)
+
+    for j in range(starts.shape[0]):
+
+        # (stop^(k+1) - start^(k+1)) / (k+1)
+
+        a = starts[j]
+        b = stops[j]
+
+        power_a = a
+        power_b = b
+
+        for k in range(n_coefficients):
+
+            basis[k] = (power_b - power_a) / (k + 1)
+
+            power_a *= a
+            power_b *= b
+
+        for i in range(n_channels):
+
+            integral = 0.0
+            variance = 0.0
+
+            for k in range(n_coefficients):
+
+                integral += coefficients[i, k] * basis[k]
+
+                for l in range(n_coefficients):
+
+                    variance += basis[k] * covariances[i, k, l] * basis[l]
+
+            counts[i] += integral
+            variances[i] += variance
+
+    return counts, np.sqrt(variances)
+
 
 class ReducingNumberOfThreads(Warning):
     pass
@@ -64,6 +150,13 @@ class _OutputContainer:
     rate_error: Optional[Iterable[float]] = None
 
 class TimeSeries(object):
+
+    # the float type the background polynomials are saved with
+    _bkg_store_dtype = np.float64
+
+    # the number of grade searches that are remembered
+    _grade_cache_size = 4
+
     def __init__(
         self,
         start_time: float,
@@ -107,6 +200,14 @@ class TimeSeries(object):
         self._verbose: bool = verbose
         self._n_channels: int = n_channels
         self._first_channel: int = first_channel
+
+        # these only depend on the channels, so they are built once
+        # and shared by all the extracted containers
+
+        self._channel_ids: np.ndarray = (
+            np.arange(n_channels, dtype=np.int32) + first_channel
+        )
+        self._grouping_ones: np.ndarray = np.ones(n_channels, dtype=np.int16)
         self._native_quality = native_quality
 
         # we haven't made selections yet
@@ -117,8 +218,15 @@ class TimeSeries(object):
         self._exposure = None
         self._poly_counts = None
         self._poly_count_err = None
-        self._bkg_selected_counts = None
-        self._bkg_exposure = None
+
+        # the clipped background intervals and, once requested,
+        # the counts and exposure aggregated over them
+
+        self._bkg_selection = None
+        self._bkg_aggregate = None
+
+        # the polynomial coefficients and covariances stacked in arrays
+        self._polynomial_arrays = None
 
         # ebounds for objects w/o a response
         self._edges = edges
@@ -161,10 +269,40 @@ class TimeSeries(object):
 
         self._fit_method_info = {"bin type": None, "fit method": None}
 
+        # the outputs of get_information_dict, keyed on (use_poly, extract).
+        # Cleared whenever the selections or the polynomials change
+
+        self._info_cache = {}
+
+        # the log likelihoods of the last few grade searches, keyed on a
+        # digest of the data that was fit, so that refits can skip the
+        # search. The key of the search behind the current fit is kept
+
+        self._grade_cache = collections.OrderedDict()
+
+        self._current_grade_key = None
+
     def set_active_time_intervals(self, *args):
 
         raise RuntimeError("Must be implemented in subclass")
 
+    @staticmethod
+    def _as_time_interval_set(*time_intervals) -> TimeIntervalSet:
+        """
+        build a TimeIntervalSet from intervals specified as 'tmin-tmax'.
+        An existing TimeIntervalSet can be passed instead, in which case
+        it is copied rather than formatted to strings and parsed again
+
+        :param time_intervals: the interval strings or a TimeIntervalSet
+        :returns: a new TimeIntervalSet
+        """
+
+        if len(time_intervals) == 1 and isinstance(time_intervals[0], TimeIntervalSet):
+
+            return TimeIntervalSet(time_intervals[0])
+
+        return TimeIntervalSet.from_strings(*time_intervals)
+
     @property
     def poly_fit_exists(self) -> bool:
 
@@ -198,14 +336,14 @@ class TimeSeries(object):
 
         if self._poly_fit_exists:
 
-            coeff = []
-            err = []
+            coefficients, covariances = self._get_polynomial_arrays()
 
-            for poly in self._polynomials:
-                coeff.append(poly.coefficients)
-                err.append(poly.error)
-            df_coeff = pd.DataFrame(coeff)
-            df_err = pd.DataFrame(err)
+            # the frames wrap the stacked arrays without copying them
+
+            df_coeff = pd.DataFrame(coefficients, copy=False)
+            df_err = pd.DataFrame(
+                np.sqrt(np.diagonal(covariances, axis1=1, axis2=2)), copy=False
+            )
 
             # print('Coefficients')
             #
@@ -224,6 +362,85 @@ class TimeSeries(object):
             log.error("A polynomial fit has not been made.")
             RuntimeError()
 
+    def _get_polynomial_arrays(self):
+        """
+        The coefficients and covariance matrices of the polynomials of all
+        the channels, stacked in arrays of shape (n_channels, n_coefficients)
+        and (n_channels, n_coefficients, n_coefficients). They are built
+        only once for each set of polynomials
+
+        :returns: coefficients, covariances
+        """
+
+        if (
+            self._polynomial_arrays is None
+            or self._polynomial_arrays[0] is not self._polynomials
+            or self._polynomial_arrays[1] != len(self._polynomials)
+        ):
+
+            n_coefficients = max((p.degree for p in self._polynomials), default=0) + 1
+
+            # lower degree polynomials are padded with zeros
+
+            coefficients = np.zeros((len(self._polynomials), n_coefficients))
+            covariances = np.zeros(
+                (len(self._polynomials), n_coefficients, n_coefficients)
+            )
+
+            for i, p in enumerate(self._polynomials):
+
+                n = p.degree + 1
+
+                coefficients[i, :n] = p.coefficients
+                covariances[i, :n, :n] = p.covariance_matrix
+
+            # they are handed out (e.g. by get_poly_info) without copies
+
+            coefficients.flags.writeable = False
+            covariances.flags.writeable = False
+
+            self._polynomial_arrays = (
+                self._polynomials,
+                len(self._polynomials),
+                coefficients,
+                covariances,
+            )
+
+        return self._polynomial_arrays[2], self._polynomial_arrays[3]
+
+    def _integrate_polynomials_over_intervals(self, starts, stops):
+        """
+        The polynomial counts and errors of each channel integrated
+        over the given intervals
+
+        :param starts: interval starts
+        :param stops: interval stops
+        :returns: counts, errors
+        """
+
+        coefficients, covariances = self._get_polynomial_arrays()
+
+        return _integrate_channels(
+            coefficients,
+            covariances,
+            np.ascontiguousarray(starts, dtype=float),
+            np.ascontiguousarray(stops, dtype=float),
+        )
+
+    @staticmethod
+    def _integral_basis(start, stop, n_coefficients):
+        """
+        (stop^(k+1) - start^(k+1)) / (k+1) for each power k of the polynomials.
+        start and stop can be arrays, the powers run along the last axis
+        """
+
+        powers = np.arange(1, n_coefficients + 1, dtype=float)
+
+        start = np.asarray(start, dtype=float)[..., np.newaxis]
+        stop = np.asarray(stop, dtype=float)[..., np.newaxis]
+
+        return (np.power(stop, powers) - np.power(start, powers)) / powers
+
     def get_total_poly_count(self, start: float,
                              stop: float, mask=None) -> int:
         """
@@ -234,15 +451,19 @@ class TimeSeries(object):
         :param stop:
         :return:
         """
-        if mask is None:
-            mask = np.ones_like(self._polynomials, dtype=bool)
 
-        total_counts = 0
+        coefficients, _ = self._get_polynomial_arrays()
 
-        for p in np.asarray(self._polynomials)[mask]:
-            total_counts += p.integral(start, stop)
+        if mask is not None:
 
-        return total_counts
+            coefficients = coefficients[mask]
+
+        # the integral is linear in the coefficients, so we
+        # can sum the polynomials of all the channels first
+
+        basis = self._integral_basis(start, stop, coefficients.shape[1])
+
+        return basis.dot(coefficients.sum(axis=0))
 
     def get_total_poly_error(self, start: float,
                              stop: float, mask=None)-> float:
@@ -254,15 +475,23 @@ class TimeSeries(object):
         :param stop:
         :return:
         """
-        if mask is None:
-            mask = np.ones_like(self._polynomials, dtype=bool)
 
-        total_counts = 0
+        _, covariances = self._get_polynomial_arrays()
+
+        if mask is not None:
+
+            covariances = covariances[mask]
 
-        for p in np.asarray(self._polynomials)[mask]:
-            total_counts += p.integral_error(start, stop) ** 2
+        # the variances of the channels add up, and they are
+        # all quadratic forms on the same basis
 
-        return np.sqrt(total_counts)
+        basis = self._integral_basis(start, stop, covariances.shape[1])
+
+        total_variance = np.einsum(
+            "...i,ij,...j->...", basis, covariances.sum(axis=0), basis
+        )
+
+        return np.sqrt(total_variance)
 
     @property
     def bins(self):
@@ -298,9 +527,11 @@ class TimeSeries(object):
 
                 log.debug("recomputing time selection")
 
-                self.set_polynomial_fit_interval(
-                    *self._bkg_intervals.to_string().split(","),
+                self.set_background_interval(
+                    self._bkg_intervals,
+                    fit_poly=True,
                     unbinned=self._unbinned,
+                    bayes=self._fit_method_info["fit method"] == _FIT_METHOD_LABEL[True],
                 )
 
             else:
@@ -365,6 +596,39 @@ class TimeSeries(object):
 
         raise RuntimeError("Must be implemented in sub class")
 
+    def exposure_over_intervals(self, starts, stops) -> np.ndarray:
+        """
+        calculate the exposure over each of the given intervals.
+        Sub classes can override this with a batched version
+
+        :param starts: array of interval starts
+        :param stops: array of interval stops
+        :return: array of exposures, one per interval
+        """
+
+        return np.array(
+            [self.exposure_over_interval(t1, t2) for t1, t2 in zip(starts, stops)],
+            dtype=float,
+        )
+
+    def count_per_channel_over_intervals(self, starts, stops) -> np.ndarray:
+        """
+        return the counts per channel in each of the given intervals.
+        Sub classes can override this with a batched version
+
+        :param starts: array of interval starts
+        :param stops: array of interval stops
+        :return: array of shape (n_intervals, n_channels)
+        """
+
+        counts = np.zeros((len(starts), self._n_channels))
+
+        for i, (t1, t2) in enumerate(zip(starts, stops)):
+
+            counts[i] = self.count_per_channel_over_interval(t1, t2)
+
+        return counts
+
     def set_background_interval(self, *time_intervals, **options):
         """Set the time interval for the background observation.
         Multiple intervals can be input as separate arguments
@@ -431,13 +695,7 @@ class TimeSeries(object):
                      "is only correct if the dead time ratio is constant "
                      "in the selected background time intervals!")
 
-        if bayes:
-
-            self._fit_method_info["fit method"] = "bayes"
-
-        else:
-
-            self._fit_method_info["fit method"] = "mle"
+        self._fit_method_info["fit method"] = _FIT_METHOD_LABEL[bool(bayes)]
 
         # Fit the events with the given intervals
         if unbinned:
@@ -465,71 +723,113 @@ class TimeSeries(object):
         # recalculate the selected counts
 
         if self._time_selection_exists:
-            self.set_active_time_intervals(
-                *self._time_intervals.to_string().split(",")
-            )
+            self.set_active_time_intervals(self._time_intervals)
 
     def _select_background_time_interval(self, *time_intervals):
 
+        self._info_cache.clear()
+
         # we create some time intervals
 
-        bkg_intervals = TimeIntervalSet.from_strings(*time_intervals)
+        bkg_intervals = self._as_time_interval_set(*time_intervals)
 
         # adjust the selections to the data
 
-        new_intervals = []
+        t1s = np.array(bkg_intervals.start_times, dtype=float)
+        t2s = np.array(bkg_intervals.stop_times, dtype=float)
 
-        self._bkg_selected_counts = []
+        keep = (t1s < self._stop_time) & (t2s > self._start_time)
 
-        self._bkg_exposure = 0.
+        for t1, t2 in zip(t1s[~keep], t2s[~keep]):
+            log.warning(
+                f"The time interval {t1}-{t2} is out side of the "
+                "arrival times and will be dropped"
+            )
 
-        for time_interval in bkg_intervals:
+        t1s = t1s[keep]
+        t2s = t2s[keep]
 
-            t1 = time_interval.start_time
-            t2 = time_interval.stop_time
+        for t1, t2 in zip(t1s[t1s < self._start_time], t2s[t1s < self._start_time]):
+            log.warning(
+                f"The time interval {t1}-{t2} started before the "
+                f"first arrival time ({self._start_time}), so we are"
+                f"changing the intervals to {self._start_time}-{t2}"
+            )
 
-            if (self._stop_time <= t1) or (t2 <= self._start_time):
-                log.warning(
-                    f"The time interval {t1}-{t2} is out side of the "
-                    "arrival times and will be dropped"
-                )
+        t1s = np.maximum(t1s, self._start_time)
 
-            else:
+        for t1, t2 in zip(t1s[t2s > self._stop_time], t2s[t2s > self._stop_time]):
+            log.warning(
+                f"The time interval {t1}-{t2} ended after the last "
+                f"arrival time ({self._stop_time}), so we are "
+                f"changing the intervals to {t1}-{self._stop_time}"
+            )
 
-                if t1 < self._start_time:
-                    log.warning(
-                        f"The time interval {t1}-{t2} started before the "
-                        f"first arrival time ({self._start_time}), so we are"
-                        f"changing the intervals to {self._start_time}-{t2}"
-                    )
+        t2s = np.minimum(t2s, self._stop_time)
+
+        # make new intervals after checks
 
-                    t1 = self._start_time  # + 1
+        bkg_intervals = TimeIntervalSet.from_starts_and_stops(t1s, t2s)
 
-                if t2 > self._stop_time:
-                    log.warning(
-                        f"The time interval {t1}-{t2} ended after the last "
-                        f"arrival time ({self._stop_time}), so we are "
-                        f"changing the intervals to {t1}-{self._stop_time}"
-                    )
+        self._set_background_selection(t1s, t2s)
 
-                    t2 = self._stop_time  # - 1.
+        # set the poly intervals as an attribute
 
-                new_intervals.append(f"{t1}-{t2}")
+        self._bkg_intervals = bkg_intervals
 
-                self._bkg_selected_counts.append(
-                    self.count_per_channel_over_interval(t1, t2)
-                )
-                self._bkg_exposure += self.exposure_over_interval(t1, t2)
+    def _set_background_selection(self, t1s, t2s):
+        """
+        record the clipped background intervals. The counts and exposure
+        over them are only aggregated when needed, and are kept if the
+        intervals did not change
 
-        # make new intervals after checks
+        :param t1s: interval starts
+        :param t2s: interval stops
+        """
 
-        bkg_intervals = TimeIntervalSet.from_strings(*new_intervals)
+        if (
+            self._bkg_selection is not None
+            and np.array_equal(self._bkg_selection[0], t1s)
+            and np.array_equal(self._bkg_selection[1], t2s)
+        ):
 
-        self._bkg_selected_counts = np.sum(self._bkg_selected_counts, axis=0)
+            return
 
-        # set the poly intervals as an attribute
+        self._bkg_selection = (t1s, t2s)
+        self._bkg_aggregate = None
 
-        self._bkg_intervals = bkg_intervals
+    def _get_background_aggregate(self):
+        """
+        the counts per channel and the exposure summed over
+        the background intervals
+
+        :returns: counts, exposure
+        """
+
+        if self._bkg_aggregate is None:
+
+            if self._bkg_selection is None:
+
+                return None, None
+
+            t1s, t2s = self._bkg_selection
+
+            self._bkg_aggregate = (
+                self.count_per_channel_over_intervals(t1s, t2s).sum(axis=0),
+                float(self.exposure_over_intervals(t1s, t2s).sum()),
+            )
+
+        return self._bkg_aggregate
+
+    @property
+    def _bkg_selected_counts(self):
+
+        return self._get_background_aggregate()[0]
+
+    @property
+    def _bkg_exposure(self):
+
+        return self._get_background_aggregate()[1]
 
     def _delete_polynominal_fit(self):
         """
@@ -540,6 +840,8 @@ class TimeSeries(object):
             log.error("You can not delete the polynominal fit information "
                       "because no information is saved at the moment!")
             raise AssertionError()
+        self._info_cache.clear()
+        self._polynomial_arrays = None
         del self._unbinned
         del self._polynomials
         del self._optimal_polynomial_grade
@@ -559,131 +861,19 @@ class TimeSeries(object):
                     "next release. Please use set_background_interval with "
                     "the same input.")
         warnings.warn(DeprecationWarning())
-        # Find out if we want to binned or unbinned.
-        if "unbinned" in kwargs:
-            unbinned = kwargs.pop("unbinned")
-            assert type(
-                unbinned) == bool, "unbinned option must be True or False"
-
-        else:
-
-            # assuming unbinned
-            # could use config file here
-            # unbinned = threeML_config['ogip']['use-unbinned-poly-fitting']
-
-            unbinned = True
-
-
-        # check if we are doing a bayesian
-        # fit and record this info
-
-        if "bayes" in kwargs:
-            bayes = kwargs.pop("bayes")
-
-        else:
 
-            bayes = False
+        # this used to default to an unbinned mle fit, whatever the
+        # configuration says, so keep doing that
 
-        if bayes:
+        unbinned = kwargs.pop("unbinned", True)
+        assert type(unbinned) == bool, "unbinned option must be True or False"
 
-            self._fit_method_info["fit method"] = "bayes"
+        bayes = kwargs.pop("bayes", False)
 
-        else:
-
-            self._fit_method_info["fit method"] = "mle"
-
-        if unbinned:
-            log.info("At the moment this unbinned polynominal fitting "
-                     "is only correct if the dead time ratio is constant "
-                     "in the selected background time intervals!")
-        # we create some time intervals
-
-        bkg_intervals = TimeIntervalSet.from_strings(*time_intervals)
-
-        # adjust the selections to the data
-
-        new_intervals = []
-
-        self._bkg_selected_counts = []
-
-        self._bkg_exposure = 0.0
-
-        for time_interval in bkg_intervals:
-
-            t1 = time_interval.start_time
-            t2 = time_interval.stop_time
-
-            if (self._stop_time <= t1) or (t2 <= self._start_time):
-                log.warning(
-                    "The time interval %f-%f is out side of the arrival times and will be dropped"
-                    % (t1, t2)
-                )
-
-            else:
-
-                if t1 < self._start_time:
-                    log.warning(
-                        "The time interval %f-%f started before the first arrival time (%f), so we are changing the intervals to %f-%f"
-                        % (t1, t2, self._start_time, self._start_time, t2)
-                    )
-
-                    t1 = self._start_time  # + 1
-
-                if t2 > self._stop_time:
-                    log.warning(
-                        "The time interval %f-%f ended after the last arrival time (%f), so we are changing the intervals to %f-%f"
-                        % (t1, t2, self._stop_time, t1, self._stop_time)
-                    )
-
-                    t2 = self._stop_time  # - 1.
-
-                new_intervals.append("%f-%f" % (t1, t2))
-
-                self._bkg_selected_counts.append(
-                    self.count_per_channel_over_interval(t1, t2)
-                )
-                self._bkg_exposure += self.exposure_over_interval(t1, t2)
-
-        # make new intervals after checks
-
-        bkg_intervals = TimeIntervalSet.from_strings(*new_intervals)
-
-        self._bkg_selected_counts = np.sum(self._bkg_selected_counts, axis=0)
-
-        # set the poly intervals as an attribute
-
-        self._bkg_intervals = bkg_intervals
-
-        # Fit the events with the given intervals
-        if unbinned:
-
-            self._unbinned = True  # keep track!
-
-            self._unbinned_fit_polynomials(bayes=bayes)
-
-        else:
-
-            self._unbinned = False
-
-            self._fit_polynomials(bayes=bayes)
-
-        # we have a fit now
-
-        self._poly_fit_exists = True
-
-        log.info(
-            f"{self._fit_method_info['bin type']} "
-            f"{self._optimal_polynomial_grade}-order "
-            "polynomial fit with the "
-            f"{self._fit_method_info['fit method']} method"
+        self.set_background_interval(
+            *time_intervals, fit_poly=True, unbinned=unbinned, bayes=bayes, **kwargs
         )
 
-        # recalculate the selected counts
-
-        if self._time_selection_exists:
-            self.set_active_time_intervals(
-                *self._time_intervals.to_string().split(","))
-
     def get_information_dict(
         self, use_poly: bool = False, extract: bool = False
     ) -> _OutputContainer:
@@ -696,6 +886,12 @@ class TimeSeries(object):
             log.error("No time selection exists! Cannot calculate rates")
             raise RuntimeError()
 
+        key = (bool(use_poly), bool(extract))
+
+        if key in self._info_cache:
+
+            return self._info_cache[key]
+
         if extract:
 
             log.debug("using extract method")
@@ -721,19 +917,18 @@ class TimeSeries(object):
 
             counts_err = self._poly_count_err
             counts = self._poly_counts
-            rate_err = self._poly_count_err / self._exposure
-            rates = self._poly_counts / self._exposure
             exposure = self._exposure
 
-            # removing negative counts
+            # removing negative counts. This is done before computing the
+            # rates so that they inherit the zeros
 
             idx = counts < 0.0
 
             counts[idx] = 0.0
             counts_err[idx] = 0.0
 
-            rates[idx] = 0.0
-            rate_err[idx] = 0.0
+            rate_err = counts_err / exposure
+            rates = counts / exposure
 
         else:
 
@@ -764,14 +959,14 @@ class TimeSeries(object):
                                                             tstart=self._time_intervals.absolute_start_time,
                                                             telapse=(self._time_intervals.absolute_stop_time
                                                                      - self._time_intervals.absolute_start_time),
-                                                            channel=np.arange(self._n_channels) + self._first_channel,
+                                                            channel=self._channel_ids,
                                                             counts=counts,
                                                             counts_error=counts_err,
                                                             rates=rates,
                                                             rate_error=rate_err,
                                                             edges=self._edges,
                                                             backfile="NONE",
-                                                            grouping=np.ones(self._n_channels),
+                                                            grouping=self._grouping_ones,
                                                             exposure=exposure,
                                                             quality=quality)
         
@@ -780,6 +975,11 @@ class TimeSeries(object):
 
         # container_dict['response'] = self._response
 
+        # the container is frozen, so it can be handed out again
+        # until the selections change
+
+        self._info_cache[key] = container_dict
+
         return container_dict
 
     def __repr__(self):
@@ -837,21 +1037,27 @@ class TimeSeries(object):
 
         log.debug("attempting to find best poly with binned data")
 
-        if threeML_config["parallel"]["use_parallel"]:
+        key = ("binned", self._grade_search_digest(cnts, bins, exposure), bool(bayes))
 
-            def worker(grade):
+        if key in self._grade_cache:
 
-                polynomial, log_like = polyfit(
-                    bins, cnts, grade, exposure, bayes=bayes)
+            log.debug("reusing a previous grade search")
+
+            log_likelihoods = self._grade_cache[key]
 
-                return log_like
+            self._grade_cache.move_to_end(key)
 
-            client = ParallelClient()
+        elif threeML_config["parallel"]["use_parallel"]:
 
-            log_likelihoods = client.execute_with_progress_bar(
-                worker,
-                list(range(min_grade, max_grade + 1)),
-                name="Finding best polynomial Order"
+            # these are only a handful of independent fits, so they are
+            # run on local processes rather than through ipyparallel
+
+            grades = list(range(min_grade, max_grade + 1))
+
+            log_likelihoods = Parallel(n_jobs=min(len(grades), os.cpu_count() or 1))(
+                delayed(_binned_grade_log_like)(
+                    bins, cnts, grade, exposure, bayes)
+                for grade in grades
             )
 
         else:
@@ -866,30 +1072,61 @@ class TimeSeries(object):
 
                 log_likelihoods.append(log_like)
 
+        self._remember_grade_search(key, log_likelihoods)
+
         # Found the best one
-        delta_loglike = np.array(
-            [2 * (x[0] - x[1])
-             for x in zip(log_likelihoods[:-1], log_likelihoods[1:])]
-        )
+        delta_loglike = -2.0 * np.diff(np.asarray(log_likelihoods, dtype=float))
 
         log.debug(f"log likes {log_likelihoods}")
         log.debug(f" delta loglikes {delta_loglike}")
 
         delta_threshold = 9.0
 
-        mask = delta_loglike >= delta_threshold
+        improved = np.flatnonzero(delta_loglike >= delta_threshold)
 
-        if len(mask.nonzero()[0]) == 0:
+        if improved.size == 0:
 
             # best grade is zero!
             best_grade = 0
 
         else:
 
-            best_grade = mask.nonzero()[0][-1] + 1
+            best_grade = int(improved[-1]) + 1
 
         return best_grade
 
+    def _remember_grade_search(self, key, log_likelihoods) -> None:
+        """
+        keep a grade search as the one behind the current fit, forgetting
+        the least recently used ones beyond _grade_cache_size
+        """
+
+        self._grade_cache[key] = log_likelihoods
+        self._grade_cache.move_to_end(key)
+
+        while len(self._grade_cache) > self._grade_cache_size:
+
+            self._grade_cache.popitem(last=False)
+
+        self._current_grade_key = key
+
+    @staticmethod
+    def _grade_search_digest(*arrays) -> str:
+        """
+        a digest of the data going into a grade search
+        """
+
+        digest = hashlib.sha1()
+
+        for array in arrays:
+
+            array = np.ascontiguousarray(array, dtype=float)
+
+            digest.update(str(array.shape).encode())
+            digest.update(array.tobytes())
+
+        return digest.hexdigest()
+
     def _unbinned_fit_global_and_determine_optimum_grade(self,
                                                          events,
                                                          exposure,
@@ -917,22 +1154,28 @@ class TimeSeries(object):
 
         log.debug("attempting to find best fit poly with unbinned")
 
-        if threeML_config["parallel"]["use_parallel"]:
+        key = (
+            "unbinned",
+            self._grade_search_digest(events, exposure, t_start, t_stop),
+            bool(bayes),
+        )
 
-            def worker(grade):
+        if key in self._grade_cache:
 
-                polynomial, log_like = unbinned_polyfit(
-                    events, grade, t_start, t_stop, exposure, bayes=bayes
-                )
+            log.debug("reusing a previous grade search")
+
+            log_likelihoods = self._grade_cache[key]
 
-                return log_like
+            self._grade_cache.move_to_end(key)
 
-            client = ParallelClient()
+        elif threeML_config["parallel"]["use_parallel"]:
 
-            log_likelihoods = client.execute_with_progress_bar(
-                worker,
-                list(range(min_grade, max_grade + 1)),
-                name="Finding best polynomial Order"
+            grades = list(range(min_grade, max_grade + 1))
+
+            log_likelihoods = Parallel(n_jobs=min(len(grades), os.cpu_count() or 1))(
+                delayed(_unbinned_grade_log_like)(
+                    events, grade, t_start, t_stop, exposure, bayes)
+                for grade in grades
             )
 
         else:
@@ -946,27 +1189,26 @@ class TimeSeries(object):
 
                 log_likelihoods.append(log_like)
 
+        self._remember_grade_search(key, log_likelihoods)
+
         # Found the best one
-        delta_loglike = np.array(
-            [2 * (x[0] - x[1])
-             for x in zip(log_likelihoods[:-1], log_likelihoods[1:])]
-        )
+        delta_loglike = -2.0 * np.diff(np.asarray(log_likelihoods, dtype=float))
 
         log.debug(f"log likes {log_likelihoods}")
         log.debug(f" delta loglikes {delta_loglike}")
 
         delta_threshold = 9.0
 
-        mask = delta_loglike >= delta_threshold
+        improved = np.flatnonzero(delta_loglike >= delta_threshold)
 
-        if len(mask.nonzero()[0]) == 0:
+        if improved.size == 0:
 
             # best grade is zero!
             best_grade = 0
 
         else:
 
-            best_grade = mask.nonzero()[0][-1] + 1
+            best_grade = int(improved[-1]) + 1
 
         return best_grade
 
@@ -978,14 +1220,22 @@ class TimeSeries(object):
 
         raise NotImplementedError("this must be implemented in a subclass")
 
-    def save_background(self, filename, overwrite=False):
+    def save_background(self, filename, overwrite=False, dtype=None):
         """
         save the background to an HD5F
 
         :param filename:
+        :param overwrite:
+        :param dtype: the float type the polynomial coefficients and
+        covariances are stored with. np.float32 halves the file size at
+        the cost of precision. Defaults to _bkg_store_dtype
         :return:
         """
 
+        if dtype is None:
+
+            dtype = self._bkg_store_dtype
+
         # make the file name proper
 
         filename = os.path.splitext(filename)
@@ -995,106 +1245,200 @@ class TimeSeries(object):
         filename_sanitized: Path = sanitize_filename(filename)
 
         # Check that it does not exists
-        if filename_sanitized.exists():
+        if filename_sanitized.exists() and not overwrite:
 
-            if overwrite:
+            log.error(f"The file {filename_sanitized} already exists!")
+            raise IOError()
 
-                try:
+        # the background is first written to a temporary file that then
+        # replaces the target in one step, so that an existing background
+        # is never left half written
 
-                    filename_sanitized.unlink()
+        tmp_filename: Path = filename_sanitized.with_name(
+            filename_sanitized.name + ".tmp"
+        )
 
-                except:
+        try:
 
-                    log.error(
-                        f"The file {filename_sanitized} already exists "
-                        "and cannot be removed (maybe you do not have "
-                        "permissions to do so?). "
-                    )
+            # paged aggregation keeps the metadata of the few datasets and
+            # attributes together, so restoring it takes few reads. The pages
+            # are kept small because these files are only a few kB. The
+            # HDF5 1.10 file format, which paged aggregation needs, has
+            # compact object headers. It cannot be read by HDF5 < 1.10.
+            # Paged aggregation needs h5py >= 3.0 and HDF5 >= 1.10.1
 
-                    raise IOError()
+            with h5py.File(
+                tmp_filename,
+                "w",
+                libver=("v110", "latest"),
+                fs_strategy="page",
+                fs_page_size=4096,
+            ) as store:
 
-            else:
+                self._write_background(store, dtype)
+
+            try:
+
+                os.replace(tmp_filename, filename_sanitized)
+
+            except OSError:
+
+                log.error(
+                    f"The file {filename_sanitized} already exists "
+                    "and cannot be replaced (maybe you do not have "
+                    "permissions to do so?). "
+                )
 
-                log.error(f"The file {filename_sanitized} already exists!")
                 raise IOError()
 
-        with h5py.File(filename_sanitized, "w") as store:
+        finally:
 
-            # extract the polynomial information and save it
+            if tmp_filename.exists():
 
-            if self._poly_fit_exists:
+                tmp_filename.unlink()
 
-                coeff = np.empty(
-                    (self._n_channels, self._optimal_polynomial_grade + 1))
-                err = np.empty(
-                    (
-                        self._n_channels,
-                        self._optimal_polynomial_grade + 1,
-                        self._optimal_polynomial_grade + 1,
-                    )
-                )
+        log.info(f"Saved fitted background to {filename_sanitized}")
 
-                for i, poly in enumerate(self._polynomials):
+    def _write_background(self, store, dtype) -> None:
+        """
+        write the polynomial fit to an open HDF5 file
 
-                    coeff[i, :] = poly.coefficients
+        :param store: the h5py file
+        :param dtype: the float type of the stored polynomials
+        """
 
-                    err[i, ...] = poly.covariance_matrix
+        # extract the polynomial information and save it
 
-                # df_coeff = pd.Series(coeff)
-                # df_err = pd.Series(err)
+        if self._poly_fit_exists:
 
-            else:
+            # these are already stacked over the channels and
+            # can be written as they are
 
-                log.error("the polynomials have not been fit yet")
-                raise RuntimeError()
+            coeff, err = self._get_polynomial_arrays()
 
-            store.create_dataset("coefficients", data=np.array(coeff))
-            store.create_dataset("covariance", data=np.array(err))
+            coeff = coeff.astype(dtype, copy=False)
+            err = err.astype(dtype, copy=False)
 
-            store.attrs["poly_order"] = self._optimal_polynomial_grade
-            store.attrs["poly_selections"] = list(
-                zip(
-                    self._bkg_intervals.start_times,
-                    self._bkg_intervals.stop_times,
-                )
+        else:
+
+            log.error("the polynomials have not been fit yet")
+            raise RuntimeError()
+
+        # the channels have similar polynomials, so the arrays
+        # shrink well once byte-shuffled. No time stamps are written
+        # so that the same background always gives the same file
+
+        n_channels, n_coefficients = coeff.shape
+
+        store.create_dataset(
+            "coefficients",
+            data=coeff,
+            chunks=(min(n_channels, 64), n_coefficients),
+            shuffle=True,
+            compression="gzip",
+            compression_opts=4,
+            track_times=False,
+        )
+        store.create_dataset(
+            "covariance",
+            data=err,
+            chunks=(min(n_channels, 32), n_coefficients, n_coefficients),
+            shuffle=True,
+            compression="gzip",
+            compression_opts=4,
+            track_times=False,
+        )
+
+        store.create_dataset(
+            "poly_selections",
+            data=np.column_stack(
+                [
+                    np.asarray(self._bkg_intervals.start_times, dtype=float),
+                    np.asarray(self._bkg_intervals.stop_times, dtype=float),
+                ]
+            ),
+            track_times=False,
+        )
+
+        store.attrs["poly_order"] = self._optimal_polynomial_grade
+        store.attrs["unbinned"] = self._unbinned
+        store.attrs["fit_method"] = self._fit_method_info["fit method"]
+
+        # keep the grade search of this fit so that refits of the
+        # restored background do not have to redo it
+
+        grade_searches = store.create_group("grade_searches")
+
+        key = self._current_grade_key
+
+        if key in self._grade_cache:
+
+            search = grade_searches.create_dataset(
+                "0", data=np.asarray(self._grade_cache[key], dtype=float)
             )
-            store.attrs["unbinned"] = self._unbinned
-            store.attrs["fit_method"] = self._fit_method_info["fit method"]
 
-        log.info(f"Saved fitted background to {filename_sanitized}")
+            search.attrs["kind"], search.attrs["digest"], search.attrs["bayes"] = key
+
+    @staticmethod
+    def _read_dataset(dataset) -> np.ndarray:
+        """
+        read a whole HDF5 dataset straight into a new array
+        """
+
+        array = np.empty(dataset.shape, dtype=dataset.dtype)
+
+        dataset.read_direct(array)
+
+        return array
 
     def restore_fit(self, filename):
 
         filename_sanitized: Path = sanitize_filename(filename)
 
-        with h5py.File(filename_sanitized, "r") as store:
+        # files of any format version can be read
 
-            coefficients = store["coefficients"][()]
+        with h5py.File(
+            filename_sanitized, "r", libver=("earliest", "latest")
+        ) as store:
 
-            covariance = store["covariance"][()]
+            # the polynomials always work in double precision, whatever
+            # precision they were stored with
 
-            self._polynomials = []
+            coefficients = self._read_dataset(store["coefficients"]).astype(
+                np.float64, copy=False
+            )
 
-            # create new polynomials
+            covariance = self._read_dataset(store["covariance"]).astype(
+                np.float64, copy=False
+            )
 
-            for i in range(len(coefficients)):
-                coeff = np.array(coefficients[i])
+            # make sure we get the right order
+            # pandas stores the non-needed coeff
+            # as nans. All the channels have the same order
 
-                # make sure we get the right order
-                # pandas stores the non-needed coeff
-                # as nans.
+            coefficients = coefficients[:, np.isfinite(coefficients).all(axis=0)]
 
-                coeff = coeff[np.isfinite(coeff)]
+            # create new polynomials
 
-                cov = covariance[i]
+            self._polynomials = [
+                Polynomial.from_previous_fit(coefficients[i], covariance[i])
+                for i in range(coefficients.shape[0])
+            ]
 
-                self._polynomials.append(
-                    Polynomial.from_previous_fit(coeff, cov))
+            # read all the attributes at once
 
-            metadata = store.attrs
+            metadata = dict(store.attrs)
 
             self._optimal_polynomial_grade = metadata["poly_order"]
-            poly_selections = np.array(metadata["poly_selections"])
+            # older files kept the selections as an attribute
+
+            if "poly_selections" in store:
+
+                poly_selections = self._read_dataset(store["poly_selections"])
+
+            else:
+
+                poly_selections = np.array(metadata["poly_selections"])
 
             self._bkg_intervals = TimeIntervalSet.from_starts_and_stops(
                 poly_selections[:, 0], poly_selections[:, 1]
@@ -1110,28 +1454,37 @@ class TimeSeries(object):
 
             self._fit_method_info["fit method"] = metadata["fit_method"]
 
-        # go thru and count the counts!
-        log.debug("resest the poly form the file")
-        self._poly_fit_exists = True
+            # the group holds the grade search of the saved fit. Files
+            # written before the grade searches were saved do not have it
 
-        # we must go thru and collect the polynomial exposure and counts
-        # so that they be extracted if needed
-        self._bkg_exposure = 0.0
-        self._bkg_selected_counts = []
-        for i, time_interval in enumerate(self._bkg_intervals):
+            if "0" in store.get("grade_searches", {}):
 
-            t1 = time_interval.start_time
-            t2 = time_interval.stop_time
+                search = store["grade_searches"]["0"]
 
-            self._bkg_selected_counts.append(
-                self.count_per_channel_over_interval(t1, t2)
-            )
-            self._bkg_exposure += self.exposure_over_interval(t1, t2)
+                key = (
+                    str(search.attrs["kind"]),
+                    str(search.attrs["digest"]),
+                    bool(search.attrs["bayes"]),
+                )
+
+                self._remember_grade_search(key, list(search[()]))
+
+        # go thru and count the counts!
+        log.debug("resest the poly form the file")
+        self._poly_fit_exists = True
+        self._info_cache.clear()
+
+        # the polynomial exposure and counts will be collected
+        # from these if they are extracted. They are always aggregated
+        # from the data the fit is restored onto, which need not be the
+        # data the background was fit on
+        self._set_background_selection(
+            np.array(self._bkg_intervals.start_times, dtype=float),
+            np.array(self._bkg_intervals.stop_times, dtype=float),
+        )
 
-        self._bkg_selected_counts = np.sum(self._bkg_selected_counts, axis=0)
         if self._time_selection_exists:
-            self.set_active_time_intervals(
-                *self._time_intervals.to_string().split(","))
+            self.set_active_time_intervals(self._time_intervals)
 
     def view_lightcurve(self, start=-10, stop=20.0, dt=1.0, use_binner=False,
                         use_echans_start=0, use_echans_stop=-1):